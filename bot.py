@@ -1,9 +1,11 @@
 """Точка входа для Diet Bot v2."""
 import logging
-from telegram.ext import Application, MessageHandler, filters
+from telegram.ext import Application, ContextTypes, MessageHandler, filters
 from telegram import Update
 from src.config import config
-from src.database import init_db
+from src.database import init_db, close_async_db
+from src.middleware import BotContext, get_update_processor
+from src.middleware import register_handlers as register_middleware_handlers
 from src.handlers import (
     register_start_handlers,
     register_registration_handlers,
@@ -12,6 +14,8 @@ from src.handlers import (
     register_callback_handlers,
 )
 from src.services.token_logger import log_token_usage, get_daily_stats
+from src.services.label_ocr_service import shutdown_ocr_pool
+from src.services.openrouter_client import close_openrouter_client
 import time
 
 # Настройка логирования
@@ -21,6 +25,13 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+async def on_shutdown(application: Application) -> None:
+    """Освобождение ресурсов при остановке бота."""
+    shutdown_ocr_pool()
+    await close_openrouter_client()
+    await close_async_db()
+
+
 def main() -> None:
     """Запуск бота."""
     # Проверка конфигурации
@@ -36,7 +47,14 @@ def main() -> None:
 
     # Создание приложения
     logger.info("Запуск бота...")
-    application = Application.builder().token(config.BOT_TOKEN).build()
+    application = (
+        Application.builder()
+        .token(config.BOT_TOKEN)
+        .context_types(ContextTypes(context=BotContext))
+        .concurrent_updates(get_update_processor())
+        .post_shutdown(on_shutdown)
+        .build()
+    )
 
     # Регистрация обработчиков
     register_start_handlers(application)
@@ -44,6 +62,7 @@ def main() -> None:
     register_food_handlers(application)
     register_stats_handlers(application)
     register_callback_handlers(application)
+    register_middleware_handlers(application)
 
     # Запуск с логированием токенов
     logger.info(f"📊 Token logging enabled. Daily stats will be tracked.")
@@ -17,6 +17,10 @@ class Config:
     # FatSecret API credentials
     FATSECRET_CLIENT_ID: str
     FATSECRET_CLIENT_SECRET: str
+    # Сколько апдейтов обрабатывать одновременно
+    MAX_CONCURRENT_UPDATES: int = 8
+    # Апдейты с большим числом SQL-запросов попадают в лог
+    SLOW_UPDATE_QUERIES: int = 15
 
     @classmethod
     def from_env(cls) -> "Config":
@@ -28,6 +32,8 @@ class Config:
             ADMIN_ID=int(os.getenv("ADMIN_ID")) if os.getenv("ADMIN_ID") else None,
             FATSECRET_CLIENT_ID=os.getenv("FATSECRET_CLIENT_ID", ""),
             FATSECRET_CLIENT_SECRET=os.getenv("FATSECRET_CLIENT_SECRET", ""),
+            MAX_CONCURRENT_UPDATES=int(os.getenv("MAX_CONCURRENT_UPDATES", "8")),
+            SLOW_UPDATE_QUERIES=int(os.getenv("SLOW_UPDATE_QUERIES", "15")),
         )
 
     def validate(self) -> None:
@@ -1,26 +1,157 @@
 """Подключение к базе данных SQLAlchemy."""
-from contextlib import contextmanager
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from contextlib import contextmanager, asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Optional
+from sqlalchemy import Delete, Insert, Update, create_engine, event
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from src.config import config
 
-# Создание движка БД
+
+def _async_url(url: str) -> str:
+    """URL с асинхронным драйвером: aiosqlite для SQLite, asyncpg для Postgres."""
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith("postgresql:") or url.startswith("postgres:"):
+        return "postgresql+asyncpg:" + url.split(":", 1)[1]
+    if url.startswith("postgresql+psycopg2:"):
+        return url.replace("postgresql+psycopg2:", "postgresql+asyncpg:", 1)
+    return url
+
+
+# Профиль SQLite: WAL — читатели не ждут писателя, NORMAL — fsync только на checkpoint
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,  # мс ждать блокировку вместо «database is locked»
+    "mmap_size": 268435456,  # 256 МБ
+    "cache_size": -65536,  # 64 МБ (отрицательное — в КиБ)
+    "temp_store": "MEMORY",
+    "foreign_keys": "ON",
+}
+
+# Соединений-читателей; писатель в SQLite всегда один
+SQLITE_READ_POOL_SIZE = 5
+SQLITE_WRITE_TIMEOUT = 30  # секунд ждать очереди на запись
+
+IS_SQLITE = config.DATABASE_URL.startswith("sqlite")
+
+
+def apply_sqlite_profile(dbapi_connection, connection_record=None) -> None:
+    """Выставить PRAGMA на новом соединении SQLite (sqlite3 и aiosqlite)."""
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+def create_async_engines(url: str) -> tuple[AsyncEngine, AsyncEngine]:
+    """Асинхронные движки для чтения и записи.
+
+    Для SQLite: пул читателей и отдельный движок с единственным
+    соединением-писателем — записи выстраиваются в очередь в пуле,
+    а не падают с «database is locked». Для Postgres — один движок.
+
+    Returns:
+        (движок чтения, движок записи)
+    """
+    async_url = _async_url(url)
+    if not url.startswith("sqlite"):
+        read_engine = create_async_engine(async_url, echo=False)
+        return read_engine, read_engine
+
+    read_engine = create_async_engine(
+        async_url,
+        echo=False,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=SQLITE_READ_POOL_SIZE,
+        max_overflow=0,
+    )
+    write_engine = create_async_engine(
+        async_url,
+        echo=False,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=SQLITE_WRITE_TIMEOUT,
+    )
+    for item in (read_engine, write_engine):
+        event.listen(item.sync_engine, "connect", apply_sqlite_profile)
+    return read_engine, write_engine
+
+
+# Создание движка БД (синхронный — для init_db и скриптов)
 engine = create_engine(
     config.DATABASE_URL,
     echo=False,  # True для отладки SQL
-    connect_args={"check_same_thread": False} if "sqlite" in config.DATABASE_URL else {},
+    connect_args={"check_same_thread": False} if IS_SQLITE else {},
 )
+if IS_SQLITE:
+    event.listen(engine, "connect", apply_sqlite_profile)
+
+# Асинхронные движки — для обработчиков, не блокируют event loop
+async_engine, async_write_engine = create_async_engines(config.DATABASE_URL)
+
+
+class RoutingSession(Session):
+    """Сессия, которая читает через пул читателей, а пишет через писателя.
+
+    После первой записи сессия остаётся на писателе до конца: иначе
+    чтение из другого соединения не увидит её незакоммиченные изменения.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if (
+            self.info.get("writer")
+            or self._flushing
+            or isinstance(clause, (Insert, Update, Delete))
+        ):
+            self.info["writer"] = True
+            return async_write_engine.sync_engine
+        return async_engine.sync_engine
+
 
 # Фабрика сессий
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Асинхронная фабрика: объекты остаются доступны после commit (ленивой загрузки в async нет)
+AsyncSessionLocal = async_sessionmaker(
+    sync_session_class=RoutingSession, autoflush=False, expire_on_commit=False
+)
+
 # Базовый класс для моделей
 Base = declarative_base()
 
+# Сессия и счётчики текущего апдейта Telegram (см. update_session)
+_current_session: ContextVar[Optional[AsyncSession]] = ContextVar("current_session", default=None)
+_update_stats: ContextVar[Optional[dict]] = ContextVar("update_stats", default=None)
+
+
+def _count_query(conn, cursor, statement, parameters, context, executemany) -> None:
+    """Считаем SQL-запросы текущего апдейта (все движки)."""
+    stats = _update_stats.get()
+    if stats is not None:
+        stats["queries"] += 1
+
+
+event.listen(engine, "before_cursor_execute", _count_query)
+event.listen(async_engine.sync_engine, "before_cursor_execute", _count_query)
+if async_write_engine is not async_engine:
+    event.listen(async_write_engine.sync_engine, "before_cursor_execute", _count_query)
+
 
 def init_db() -> None:
-    """Создание всех таблиц в БД."""
+    """Создание всех таблиц в БД и применение миграций."""
+    from src.migrations import run_migrations
+
     Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
 
 
 @contextmanager
@@ -36,3 +167,73 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+@asynccontextmanager
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """Асинхронный контекстный менеджер для сессий БД.
+
+    Внутри апдейта возвращает общую сессию апдейта: commit/rollback
+    делает update_session. Вне апдейта (скрипты, тесты) открывает
+    свою сессию и коммитит при выходе без ошибок.
+
+    Использование:
+        async with get_async_db() as db:
+            user = (await db.execute(select(User))).scalars().first()
+    """
+    session = _current_session.get()
+    if session is not None:
+        yield session
+        return
+
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+
+def get_current_session() -> Optional[AsyncSession]:
+    """Сессия текущего апдейта или None (вне обработки апдейта)."""
+    return _current_session.get()
+
+
+def mark_update_failed() -> None:
+    """Откатить транзакцию апдейта вместо commit (вызывается из обработчика ошибок)."""
+    stats = _update_stats.get()
+    if stats is not None:
+        stats["failed"] = True
+
+
+@asynccontextmanager
+async def update_session() -> AsyncIterator[dict]:
+    """Одна сессия на апдейт: commit в конце или rollback при ошибке.
+
+    Yields:
+        dict со счётчиком запросов "queries" и флагом "failed"
+    """
+    stats = {"queries": 0, "failed": False}
+    async with AsyncSessionLocal() as db:
+        session_token = _current_session.set(db)
+        stats_token = _update_stats.set(stats)
+        try:
+            yield stats
+            if stats["failed"]:
+                await db.rollback()
+            else:
+                await db.commit()
+        except Exception:
+            stats["failed"] = True
+            await db.rollback()
+            raise
+        finally:
+            _current_session.reset(session_token)
+            _update_stats.reset(stats_token)
+
+
+async def close_async_db() -> None:
+    """Закрыть пулы соединений асинхронных движков (при остановке бота)."""
+    await async_engine.dispose()
+    await async_write_engine.dispose()
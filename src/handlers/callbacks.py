@@ -9,11 +9,13 @@ from telegram.ext import (
     filters,
     ContextTypes,
 )
-from src.database import get_db
+from sqlalchemy import select
 from src.models import FoodLog
 from src.keyboards.food_menu import get_ai_vision_keyboard
 from src.services.gemma_service import parse_edit_command
+from src.services.edit_parser import parse_edit_fast, FAST_PATH_MIN_CONFIDENCE
 from src.services.nutrition_calc import calculate_food_nutrition
+import asyncio
 import time
 import logging
 
@@ -36,53 +38,53 @@ async def food_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     if data.startswith("delete:"):
         log_id = int(data.split(":")[1])
 
-        with get_db() as db:
-            food_log = db.query(FoodLog).filter_by(id=log_id).first()
-            if food_log:
-                food_name = food_log.food_name
-                db.delete(food_log)
-                db.commit()
-
-                try:
-                    await query.message.delete()
-                except:
-                    pass
-                # Без уведомления - просто молча удаляем
-            else:
-                await query.message.reply_text("⚠️ Запись не найдена.")
+        db = context.db
+        food_log = await db.get(FoodLog, log_id)
+        if food_log:
+            food_name = food_log.food_name
+            await db.delete(food_log)
+            await db.flush()
+
+            try:
+                await query.message.delete()
+            except:
+                pass
+            # Без уведомления - просто молча удаляем
+        else:
+            await query.message.reply_text("⚠️ Запись не найдена.")
 
     elif data.startswith("ai_cancel:"):
         log_id = int(data.split(":")[1])
         chat_id = query.message.chat_id
 
-        with get_db() as db:
-            food_log = db.query(FoodLog).filter_by(id=log_id).first()
-            if food_log:
-                db.delete(food_log)
-                db.commit()
-
-                # Удаляем сообщение бота (фото таблицы с кнопками)
+        db = context.db
+        food_log = await db.get(FoodLog, log_id)
+        if food_log:
+            await db.delete(food_log)
+            await db.flush()
+
+            # Удаляем сообщение бота (фото таблицы с кнопками)
+            try:
+                await query.message.delete()
+            except:
+                pass
+
+            # Удаляем фото пользователя (исходное)
+            user_photo_id = context.user_data.get(f"user_photo_{log_id}")
+            if user_photo_id:
                 try:
-                    await query.message.delete()
+                    await context.bot.delete_message(chat_id=chat_id, message_id=user_photo_id)
                 except:
                     pass
 
-                # Удаляем фото пользователя (исходное)
-                user_photo_id = context.user_data.get(f"user_photo_{log_id}")
-                if user_photo_id:
-                    try:
-                        await context.bot.delete_message(chat_id=chat_id, message_id=user_photo_id)
-                    except:
-                        pass
-
-                # Очищаем контекст
-                for key in [f"user_photo_{log_id}", f"bot_photo_{log_id}"]:
-                    if key in context.user_data:
-                        del context.user_data[key]
+            # Очищаем контекст
+            for key in [f"user_photo_{log_id}", f"bot_photo_{log_id}"]:
+                if key in context.user_data:
+                    del context.user_data[key]
 
-                # Без уведомления - просто молча удаляем
-            else:
-                await query.message.reply_text("⚠️ Запись не найдена.")
+            # Без уведомления - просто молча удаляем
+        else:
+            await query.message.reply_text("⚠️ Запись не найдена.")
 
 
 async def edit_start_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
@@ -135,7 +137,7 @@ def clear_edit_context(context: ContextTypes.DEFAULT_TYPE) -> None:
 
 
 async def process_edit_input(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    """Обработка ввода изменений через Gemma."""
+    """Обработка ввода изменений: локальный разбор, при сомнениях — Gemma."""
     text = update.message.text
     log_id = context.user_data.get("editing_log_id")
     start_time = context.user_data.get("edit_start_time")
@@ -153,145 +155,147 @@ async def process_edit_input(update: Update, context: ContextTypes.DEFAULT_TYPE)
         return ConversationHandler.END
 
     # Получаем запись из БД
-    with get_db() as db:
-        food_log = db.query(FoodLog).filter_by(id=log_id).first()
-        if not food_log:
-            clear_edit_context(context)
-            await update.message.reply_text("⚠️ Запись не найдена.")
-            return ConversationHandler.END
-
-        # Получаем все продукты пользователя за сегодня (для пункта 7)
-        from datetime import datetime, timedelta
-
-        today = datetime.now().date()
-        today_logs = (
-            db.query(FoodLog)
-            .filter(
-                FoodLog.user_id == food_log.user_id,
-                FoodLog.created_at >= today,
-                FoodLog.created_at < today + timedelta(days=1),
-            )
-            .all()
+    db = context.db
+    food_log = await db.get(FoodLog, log_id)
+    if not food_log:
+        clear_edit_context(context)
+        await update.message.reply_text("⚠️ Запись не найдена.")
+        return ConversationHandler.END
+
+    # Получаем все продукты пользователя за сегодня (для пункта 7)
+    from datetime import datetime, timedelta
+
+    today = datetime.now().date()
+    result = await db.execute(
+        select(FoodLog).where(
+            FoodLog.user_id == food_log.user_id,
+            FoodLog.created_at >= today,
+            FoodLog.created_at < today + timedelta(days=1),
         )
+    )
+    today_logs = result.scalars().all()
 
-        available_foods = [log.food_name for log in today_logs]
+    available_foods = [log.food_name for log in today_logs]
 
-        # Отправляем в Gemma для анализа
+    # Частые команды разбираем локально, Gemma — только если не уверены
+    gemma_result = parse_edit_fast(text, available_foods)
+    if gemma_result["confidence"] < FAST_PATH_MIN_CONFIDENCE:
         await update.message.reply_text("🤔 Думаю...")
-        gemma_result = parse_edit_command(text, available_foods, user_id=food_log.user_id)
-
-        # Проверяем нужно ли уточнение (пункт 7-B)
-        if gemma_result.get("clarification_needed"):
-            foods_list = "\n".join([f"• {name}" for name in available_foods[:10]])
-            await update.message.reply_text(
-                f"❓ Какой продукт вы хотите изменить?\n\n"
-                f"Доступные:\n{foods_list}\n\n"
-                f"Напишите название или номер (первое, второе...)"
-            )
-            # Не очищаем контекст, ждём уточнения
-            return WAITING_EDIT_INPUT
+        gemma_result = await parse_edit_command(
+            text, available_foods, user_id=food_log.user_id
+        )
 
-        action = gemma_result.get("action")
-
-        # Обработка смены продукта (новый функционал)
-        if action == "change_product":
-            new_product = gemma_result.get("new_product")
-            if not new_product:
-                await update.message.reply_text("❌ Не понял, на что меняем.")
-                return WAITING_EDIT_INPUT
-
-            # Сохраняем вес от старой записи
-            old_grams = food_log.grams if food_log.grams > 0 else 100  # защита от 0
-
-            # Ищем новый продукт (Open Food Facts + fallback)
-            nutrition = calculate_food_nutrition(new_product, old_grams)
-
-            # Удаляем старую запись
-            db.delete(food_log)
-
-            # Создаём новую
-            new_log = FoodLog(
-                user_id=food_log.user_id,
-                food_name=nutrition["name"],
-                grams=nutrition["grams"],
-                calories=nutrition["calories"],
-                protein=nutrition["protein"],
-                fat=nutrition["fat"],
-                carbs=nutrition["carbs"],
-            )
-            db.add(new_log)
-            db.commit()
-            db.refresh(new_log)
-
-            clear_edit_context(context)
-
-            keyboard = get_ai_vision_keyboard(new_log.id)
-            await update.message.reply_text(
-                f"✅ Продукт изменён:\n\n"
-                f"🍽️ {nutrition['name']} — {nutrition['grams']}г\n"
-                f"🔥 {nutrition['calories']} ккал | "
-                f"Б:{nutrition['protein']}г Ж:{nutrition['fat']}г У:{nutrition['carbs']}г",
-                reply_markup=keyboard,
-            )
-            return ConversationHandler.END
-
-        # Обработка изменения граммовки
-        if action == "change_grams":
-            new_grams = gemma_result.get("value")
-            if not new_grams:
-                await update.message.reply_text("❌ Не удалось распознать число.")
-                return WAITING_EDIT_INPUT
-
-            # Защита от деления на ноль (пункт 1)
-            old_grams = food_log.grams if food_log.grams > 0 else 100
-
-            ratio = new_grams / old_grams
-
-            food_log.grams = new_grams
-            food_log.calories = round(food_log.calories * ratio)
-            food_log.protein = round(food_log.protein * ratio, 1)
-            food_log.fat = round(food_log.fat * ratio, 1)
-            food_log.carbs = round(food_log.carbs * ratio, 1)
-
-            db.commit()
-            clear_edit_context(context)
-
-            await update.message.reply_text(
-                f"✅ Изменено: {new_grams}г\n\n"
-                f"🍽️ {food_log.food_name}\n"
-                f"🔥 {food_log.calories} ккал\n"
-                f"🥗 Б:{food_log.protein}г Ж:{food_log.fat}г У:{food_log.carbs}г"
-            )
-            return ConversationHandler.END
-
-        # Обработка изменения калорий
-        if action == "change_calories":
-            new_calories = gemma_result.get("value")
-            if not new_calories:
-                await update.message.reply_text("❌ Не удалось распознать число.")
-                return WAITING_EDIT_INPUT
-
-            food_log.calories = new_calories
-            db.commit()
-            clear_edit_context(context)
-
-            await update.message.reply_text(
-                f"✅ Изменено: {new_calories} ккал\n\n"
-                f"🍽️ {food_log.food_name} ({food_log.grams}г)\n"
-                f"🔥 {food_log.calories} ккал\n"
-                f"🥗 Б:{food_log.protein}г Ж:{food_log.fat}г У:{food_log.carbs}г"
-            )
-            return ConversationHandler.END
-
-        # Если не поняли
+    # Проверяем нужно ли уточнение (пункт 7-B)
+    if gemma_result.get("clarification_needed"):
+        foods_list = "\n".join([f"• {name}" for name in available_foods[:10]])
         await update.message.reply_text(
-            "❓ Не понял команду. Попробуйте:\n"
-            "• «250 грамм»\n"
-            "• «300 калорий»\n"
-            "• «хочу рис вместо гречки»"
+            f"❓ Какой продукт вы хотите изменить?\n\n"
+            f"Доступные:\n{foods_list}\n\n"
+            f"Напишите название или номер (первое, второе...)"
         )
+        # Не очищаем контекст, ждём уточнения
         return WAITING_EDIT_INPUT
 
+    action = gemma_result.get("action")
+
+    # Обработка смены продукта (новый функционал)
+    if action == "change_product":
+        new_product = gemma_result.get("new_product")
+        if not new_product:
+            await update.message.reply_text("❌ Не понял, на что меняем.")
+            return WAITING_EDIT_INPUT
+
+        # Сохраняем вес от старой записи
+        old_grams = food_log.grams if food_log.grams > 0 else 100  # защита от 0
+
+        # Ищем новый продукт (Open Food Facts + fallback)
+        nutrition = await asyncio.to_thread(calculate_food_nutrition, new_product, old_grams)
+
+        # Удаляем старую запись
+        await db.delete(food_log)
+
+        # Создаём новую
+        new_log = FoodLog(
+            user_id=food_log.user_id,
+            food_name=nutrition["name"],
+            grams=nutrition["grams"],
+            calories=nutrition["calories"],
+            protein=nutrition["protein"],
+            fat=nutrition["fat"],
+            carbs=nutrition["carbs"],
+        )
+        db.add(new_log)
+        await db.flush()
+
+        clear_edit_context(context)
+
+        keyboard = get_ai_vision_keyboard(new_log.id)
+        await update.message.reply_text(
+            f"✅ Продукт изменён:\n\n"
+            f"🍽️ {nutrition['name']} — {nutrition['grams']}г\n"
+            f"🔥 {nutrition['calories']} ккал | "
+            f"Б:{nutrition['protein']}г Ж:{nutrition['fat']}г У:{nutrition['carbs']}г",
+            reply_markup=keyboard,
+        )
+        return ConversationHandler.END
+
+    # Обработка изменения граммовки
+    if action == "change_grams":
+        new_grams = gemma_result.get("value")
+        if not new_grams:
+            await update.message.reply_text("❌ Не удалось распознать число.")
+            return WAITING_EDIT_INPUT
+
+        # Защита от деления на ноль (пункт 1)
+        old_grams = food_log.grams if food_log.grams > 0 else 100
+
+        ratio = new_grams / old_grams
+
+        food_log.grams = new_grams
+        food_log.calories = round(food_log.calories * ratio)
+        food_log.protein = round(food_log.protein * ratio, 1)
+        food_log.fat = round(food_log.fat * ratio, 1)
+        food_log.carbs = round(food_log.carbs * ratio, 1)
+
+        await db.flush()
+        clear_edit_context(context)
+
+        await update.message.reply_text(
+            f"✅ Изменено: {new_grams}г\n\n"
+            f"🍽️ {food_log.food_name}\n"
+            f"🔥 {food_log.calories} ккал\n"
+            f"🥗 Б:{food_log.protein}г Ж:{food_log.fat}г У:{food_log.carbs}г"
+        )
+        return ConversationHandler.END
+
+    # Обработка изменения калорий
+    if action == "change_calories":
+        new_calories = gemma_result.get("value")
+        if not new_calories:
+            await update.message.reply_text("❌ Не удалось распознать число.")
+            return WAITING_EDIT_INPUT
+
+        food_log.calories = new_calories
+        await db.flush()
+        clear_edit_context(context)
+
+        await update.message.reply_text(
+            f"✅ Изменено: {new_calories} ккал\n\n"
+            f"🍽️ {food_log.food_name} ({food_log.grams}г)\n"
+            f"🔥 {food_log.calories} ккал\n"
+            f"🥗 Б:{food_log.protein}г Ж:{food_log.fat}г У:{food_log.carbs}г"
+        )
+        return ConversationHandler.END
+
+    # Если не поняли
+    await update.message.reply_text(
+        "❓ Не понял команду. Попробуйте:\n"
+        "• «250 грамм»\n"
+        "• «300 калорий»\n"
+        "• «хочу рис вместо гречки»"
+    )
+    return WAITING_EDIT_INPUT
+
 
 def register_handlers(application: Application) -> None:
     """Регистрация обработчиков."""
@@ -1,14 +1,20 @@
 """Обработчики добавления еды через фото и текст."""
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, InputFile
 from telegram.ext import Application, MessageHandler, filters, ContextTypes
-from src.database import get_db
-from src.models import FoodLog, Profile
+from src.models import FoodLog
 from src.services.user_service import get_user_by_telegram_id, has_profile
 from src.services.vision_service import analyze_food_photo_simple
-from src.services.fatsecret_service import find_food_in_cache_or_api, calculate_nutrition_for_weight
+from src.services.fatsecret_service import (
+    find_food_in_cache_or_api,
+    find_food_by_barcode,
+    calculate_nutrition_for_weight,
+)
+from src.services.image_triage import triage_photo, TriageDecision
+from src.services.label_ocr_service import recognize_label
 from src.services.stats_service import get_today_stats
 from src.services.nutrition_calc import calculate_food_nutrition
 from src.services.table_generator import generate_food_table
+import asyncio
 import io
 import re
 import logging
@@ -17,8 +23,8 @@ logger = logging.getLogger(__name__)
 
 
 async def handle_food_photo(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Обработка фото еды: Vision AI → FatSecret → сохранение."""
-    user = get_user_by_telegram_id(update.effective_user.id)
+    """Обработка фото еды: сортировка → штрих-код / этикетка / Vision AI → FatSecret → сохранение."""
+    user = await get_user_by_telegram_id(update.effective_user.id)
 
     if not user or not has_profile(user):
         await update.message.reply_text("❌ Сначала заполните профиль: /register")
@@ -35,72 +41,88 @@ async def handle_food_photo(update: Update, context: ContextTypes.DEFAULT_TYPE)
         photo_bytes.seek(0)
         image_data = photo_bytes.read()
 
-        vision_result = analyze_food_photo_simple(image_data)
+        # Локальная сортировка до платного запроса к Vision
+        triage = await asyncio.to_thread(triage_photo, image_data)
 
-        if not vision_result["success"] or not vision_result["foods"]:
-            await wait_message.edit_text(
-                "❌ Не удалось распознать еду на фото.\n"
-                "Попробуйте отправить название текстом, например: «борщ 300г»"
-            )
+        if triage["advice"]:
+            await wait_message.edit_text(triage["advice"])
             return
 
-        detected_foods = vision_result["foods"]
-        logger.info(f"Detected {len(detected_foods)} foods: {detected_foods}")
-
         food_entries = []
-        total_nutrition = {"calories": 0, "protein": 0, "fat": 0, "carbs": 0}
         not_found_items = []
 
-        await wait_message.edit_text(f"📊 Найдено {len(detected_foods)} продуктов. Считаю...")
-
-        for item in detected_foods:
-            food_name = item["food"]
-            weight = item["weight"]
+        if triage["decision"] == TriageDecision.BARCODE:
+            food_data = await asyncio.to_thread(find_food_by_barcode, triage["barcode"])
+            if food_data:
+                # Вес упаковки по штрих-коду неизвестен — 100г, можно изменить
+                food_entries.append(calculate_nutrition_for_weight(food_data, 100))
+
+        elif triage["decision"] == TriageDecision.LABEL:
+            await wait_message.edit_text("🔍 Читаю этикетку...")
+            caption = (update.message.caption or "").strip() or None
+            food_data = await recognize_label(
+                image_data, triage["label_box"], name=caption, user_id=user.id
+            )
+            if food_data:
+                # Значения на этикетке — на 100г, вес можно изменить
+                food_entries.append(calculate_nutrition_for_weight(food_data, 100))
 
-            food_data = find_food_in_cache_or_api(food_name)
+        # Не получилось локально — отправляем в Vision
+        if not food_entries:
+            vision_result = await analyze_food_photo_simple(image_data, user_id=user.id)
 
-            if food_data:
-                nutrition = calculate_nutrition_for_weight(food_data, weight)
-                food_entries.append(nutrition)
-
-                total_nutrition["calories"] += nutrition["calories"]
-                total_nutrition["protein"] += nutrition["protein"]
-                total_nutrition["fat"] += nutrition["fat"]
-                total_nutrition["carbs"] += nutrition["carbs"]
-            else:
-                not_found_items.append(food_name)
-                not_found_entry = {
-                    "name": food_name,
-                    "grams": weight,
-                    "calories": 0,
-                    "protein": 0,
-                    "fat": 0,
-                    "carbs": 0,
-                    "fiber": 0,
-                }
-                food_entries.append(not_found_entry)
-
-        log_ids = []
-        with get_db() as db:
-            for entry in food_entries:
-                food_log = FoodLog(
-                    user_id=user.id,
-                    food_name=entry["name"],
-                    grams=entry["grams"],
-                    calories=entry["calories"],
-                    protein=entry["protein"],
-                    fat=entry["fat"],
-                    carbs=entry["carbs"],
-                    fiber=entry.get("fiber", 0),
+            if not vision_result["success"] or not vision_result["foods"]:
+                await wait_message.edit_text(
+                    "❌ Не удалось распознать еду на фото.\n"
+                    "Попробуйте отправить название текстом, например: «борщ 300г»"
                 )
-                db.add(food_log)
-                db.commit()
-                db.refresh(food_log)
-                log_ids.append(food_log.id)
-
-        today_stats = get_today_stats(user.id)
-        profile = db.query(Profile).filter_by(user_id=user.id).first()
-        daily_calories = profile.daily_calories if profile else 2000
+                return
+
+            detected_foods = vision_result["foods"]
+            logger.info(f"Detected {len(detected_foods)} foods: {detected_foods}")
+
+            await wait_message.edit_text(f"📊 Найдено {len(detected_foods)} продуктов. Считаю...")
+
+            for item in detected_foods:
+                food_name = item["food"]
+                weight = item["weight"]
+
+                food_data = await find_food_in_cache_or_api(food_name)
+
+                if food_data:
+                    food_entries.append(calculate_nutrition_for_weight(food_data, weight))
+                else:
+                    not_found_items.append(food_name)
+                    not_found_entry = {
+                        "name": food_name,
+                        "grams": weight,
+                        "calories": 0,
+                        "protein": 0,
+                        "fat": 0,
+                        "carbs": 0,
+                        "fiber": 0,
+                    }
+                    food_entries.append(not_found_entry)
+
+        food_logs = [
+            FoodLog(
+                user_id=user.id,
+                food_name=entry["name"],
+                grams=entry["grams"],
+                calories=entry["calories"],
+                protein=entry["protein"],
+                fat=entry["fat"],
+                carbs=entry["carbs"],
+                fiber=entry.get("fiber", 0),
+            )
+            for entry in food_entries
+        ]
+        context.db.add_all(food_logs)
+        await context.db.flush()
+        log_ids = [food_log.id for food_log in food_logs]
+
+        today_stats = await get_today_stats(user.id)
+        daily_calories = user.profile.daily_calories if user.profile else 2000
         remaining = daily_calories - today_stats["calories"]
 
         await wait_message.delete()
@@ -125,7 +147,7 @@ async def handle_text_as_food(update: Update, context: ContextTypes.DEFAULT_TYPE
     if context.user_data.get("in_conversation"):
         return
 
-    user = get_user_by_telegram_id(update.effective_user.id)
+    user = await get_user_by_telegram_id(update.effective_user.id)
     if not user or not has_profile(user):
         return
     if update.message.reply_to_message:
@@ -140,33 +162,30 @@ async def handle_text_as_food(update: Update, context: ContextTypes.DEFAULT_TYPE
     try:
         name, grams = parse_food_text(text)
 
-        food_data = find_food_in_cache_or_api(name)
+        food_data = await find_food_in_cache_or_api(name)
 
         if food_data:
             nutrition = calculate_nutrition_for_weight(food_data, grams)
         else:
-            nutrition = calculate_food_nutrition(name, grams)
+            nutrition = await asyncio.to_thread(calculate_food_nutrition, name, grams)
+
+        food_log = FoodLog(
+            user_id=user.id,
+            food_name=nutrition["name"],
+            grams=nutrition["grams"],
+            calories=nutrition["calories"],
+            protein=nutrition["protein"],
+            fat=nutrition["fat"],
+            carbs=nutrition["carbs"],
+            fiber=nutrition.get("fiber", 0),
+        )
+        context.db.add(food_log)
+        await context.db.flush()
+        log_id = food_log.id
 
-        with get_db() as db:
-            food_log = FoodLog(
-                user_id=user.id,
-                food_name=nutrition["name"],
-                grams=nutrition["grams"],
-                calories=nutrition["calories"],
-                protein=nutrition["protein"],
-                fat=nutrition["fat"],
-                carbs=nutrition["carbs"],
-                fiber=nutrition.get("fiber", 0),
-            )
-            db.add(food_log)
-            db.commit()
-            db.refresh(food_log)
-            log_id = food_log.id
-
-            today_stats = get_today_stats(user.id)
-            profile = db.query(Profile).filter_by(user_id=user.id).first()
-            daily_calories = profile.daily_calories if profile else 2000
-            remaining = daily_calories - today_stats["calories"]
+        today_stats = await get_today_stats(user.id)
+        daily_calories = user.profile.daily_calories if user.profile else 2000
+        remaining = daily_calories - today_stats["calories"]
 
         await wait_message.delete()
 
@@ -9,7 +9,6 @@ from telegram.ext import (
     filters,
     ContextTypes,
 )
-from src.database import get_db
 from src.models import User, Profile, Gender, Goal, ActivityLevel
 from src.services.user_service import get_or_create_user, get_user_by_telegram_id
 from src.services.nutrition_calc import calculate_daily_needs
@@ -23,7 +22,7 @@ async def start_registration(update: Update, context: ContextTypes.DEFAULT_TYPE)
     query = update.callback_query
     await query.answer()
     
-    user = get_or_create_user(update.effective_user)
+    user = await get_or_create_user(update.effective_user)
     context.user_data["user_id"] = user.id
     
     return await ask_gender(update, context)
@@ -31,7 +30,7 @@ async def start_registration(update: Update, context: ContextTypes.DEFAULT_TYPE)
 
 async def register_start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Начало регистрации через команду /register."""
-    user = get_or_create_user(update.effective_user)
+    user = await get_or_create_user(update.effective_user)
 
     if user.profile:
         await update.message.reply_text(
@@ -236,27 +235,26 @@ async def activity_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     # Создаем профиль и показываем сводку
     data = context.user_data
     
-    with get_db() as db:
-        profile = Profile(
-            user_id=data["user_id"],
-            gender=Gender(data["gender"]),
-            age=data["age"],
-            height_cm=data["height"],
-            current_weight_kg=data["weight"],
-            target_weight_kg=data.get("target_weight"),
-            goal=Goal(data["goal"]),
-            activity_level=ActivityLevel(data["activity"]),
-        )
-        
-        # Рассчитываем нормы
-        needs = calculate_daily_needs(profile)
-        profile.daily_calories = needs["calories"]
-        profile.daily_protein = needs["protein"]
-        profile.daily_fat = needs["fat"]
-        profile.daily_carbs = needs["carbs"]
-        
-        db.add(profile)
-        db.commit()
+    profile = Profile(
+        user_id=data["user_id"],
+        gender=Gender(data["gender"]),
+        age=data["age"],
+        height_cm=data["height"],
+        current_weight_kg=data["weight"],
+        target_weight_kg=data.get("target_weight"),
+        goal=Goal(data["goal"]),
+        activity_level=ActivityLevel(data["activity"]),
+    )
+    
+    # Рассчитываем нормы
+    needs = calculate_daily_needs(profile)
+    profile.daily_calories = needs["calories"]
+    profile.daily_protein = needs["protein"]
+    profile.daily_fat = needs["fat"]
+    profile.daily_carbs = needs["carbs"]
+    
+    context.db.add(profile)
+    await context.db.flush()
     
     # Формируем сводку
     gender_text = "М" if data["gender"] == "male" else "Ж"
@@ -10,7 +10,7 @@ from src.services.user_service import get_or_create_user, has_profile, get_user_
 
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Обработка команды /start."""
-    user = get_or_create_user(update.effective_user)
+    user = await get_or_create_user(update.effective_user)
 
     if not has_profile(user):
         # Inline-кнопка регистрации
@@ -76,7 +76,7 @@ async def start_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             "• Текст - например: '200 грамм гречки'"
         )
     elif query.data == "start:stats":
-        user = get_user_by_telegram_id(update.effective_user.id)
+        user = await get_user_by_telegram_id(update.effective_user.id)
         if not user or not has_profile(user):
             await query.edit_message_text("❌ Сначала заполни профиль: /register")
             return
@@ -108,7 +108,7 @@ async def add_food_button(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 
 async def stats_button(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Обработка кнопки 'Статистика'."""
-    user = get_user_by_telegram_id(update.effective_user.id)
+    user = await get_user_by_telegram_id(update.effective_user.id)
 
     if not user or not has_profile(user):
         await update.message.reply_text("❌ Сначала заполни профиль: /register")
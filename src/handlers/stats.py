@@ -10,6 +10,11 @@ from src.services.stats_service import (
 )
 from src.services.ai_cost_service import get_all_users_costs, get_total_costs
 from src.services.token_logger import get_daily_stats, format_cost_report
+from src.services.image_triage import get_triage_stats
+from src.services.openrouter_client import get_openrouter_stats
+from src.services.edit_parser import get_fast_path_stats
+from src.services.edit_cache import get_edit_cache_stats, get_edit_cache_savings
+from src.middleware import get_update_stats
 
 # ID админа (только этот пользователь может видеть /admin_costs)
 ADMIN_TELEGRAM_ID = 310010786
@@ -17,13 +22,13 @@ ADMIN_TELEGRAM_ID = 310010786
 
 async def today_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Статистика за сегодня."""
-    user = get_user_by_telegram_id(update.effective_user.id)
+    user = await get_user_by_telegram_id(update.effective_user.id)
 
     if not user or not has_profile(user):
         await update.message.reply_text("❌ Сначала заполни профиль: /register")
         return
 
-    stats = get_today_stats(user.id)
+    stats = await get_today_stats(user.id)
     profile = user.profile
 
     # Прогресс
@@ -62,7 +67,7 @@ async def stats_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     query = update.callback_query
     await query.answer()
 
-    user = get_user_by_telegram_id(update.effective_user.id)
+    user = await get_user_by_telegram_id(update.effective_user.id)
     if not user or not has_profile(user):
         await query.edit_message_text("❌ Сначала заполни профиль: /register")
         return
@@ -71,13 +76,13 @@ async def stats_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     data = query.data
 
     if data == "stats:today":
-        stats = get_today_stats(user.id)
+        stats = await get_today_stats(user.id)
         period_name = "Сегодня"
     elif data == "stats:yesterday":
-        stats = get_yesterday_stats(user.id)
+        stats = await get_yesterday_stats(user.id)
         period_name = "Вчера"
     elif data == "stats:week":
-        stats = get_week_stats(user.id)
+        stats = await get_week_stats(user.id)
         fiber_text = f"   Клетчатка: {stats.get('fiber', 0)}г\n" if stats.get("fiber") else ""
         await query.edit_message_text(
             f"📊 <b>Статистика за неделю</b>\n\n"
@@ -94,7 +99,7 @@ async def stats_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         )
         return
     elif data == "stats:month":
-        stats = get_month_stats(user.id)
+        stats = await get_month_stats(user.id)
         fiber_text = f"   Клетчатка: {stats.get('fiber', 0)}г\n" if stats.get("fiber") else ""
         await query.edit_message_text(
             f"📊 <b>Статистика за месяц</b>\n\n"
@@ -149,8 +154,8 @@ async def admin_costs_command(update: Update, context: ContextTypes.DEFAULT_TYPE
         return
 
     # Получаем данные за 30 дней
-    total = get_total_costs(days=30)
-    users = get_all_users_costs(days=30)
+    total = await get_total_costs(days=30)
+    users = await get_all_users_costs(days=30)
 
     # Формируем отчёт
     text = (
@@ -165,6 +170,12 @@ async def admin_costs_command(update: Update, context: ContextTypes.DEFAULT_TYPE
             f"• {user['username']}: ${user['total_cost_usd']} " f"({user['request_count']} запр.)\n"
         )
 
+    savings = get_edit_cache_savings(days=30)
+    text += (
+        f"\n🗂 Кеш Gemma: {savings['cache_hits']} попаданий "
+        f"({savings['hit_rate'] * 100:.1f}%), сэкономлено ${savings['saved_usd']}\n"
+    )
+
     await update.message.reply_text(text, parse_mode="HTML")
 
 
@@ -178,9 +189,53 @@ async def tokens_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     await update.message.reply_text(report)
 
 
+async def perf_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Метрики производительности и экономии (только для админа)."""
+    if update.effective_user.id != ADMIN_TELEGRAM_ID:
+        await update.message.reply_text("❌ Нет доступа.")
+        return
+
+    triage = get_triage_stats()
+    text = f"⚙️ <b>Сортировка фото</b> (всего: {triage['total']})\n"
+    for decision, item in triage["decisions"].items():
+        text += f"• {decision}: {item['count']} ({item['share'] * 100:.1f}%)\n"
+
+    edits = get_fast_path_stats()
+    text += (
+        f"\n✏️ <b>Редактирование без Gemma</b>: {edits['fast']} из {edits['total']} "
+        f"({edits['hit_rate'] * 100:.1f}%)\n"
+    )
+
+    cache = get_edit_cache_stats()
+    savings = get_edit_cache_savings(days=30)
+    text += (
+        f"🗂 <b>Кеш Gemma</b>: {cache['hits']} попаданий, {cache['misses']} промахов "
+        f"({cache['hit_rate'] * 100:.1f}%), записей {cache['size']}\n"
+        f"• за 30 дней: {savings['cache_hits']} из {savings['cache_hits'] + savings['gemma_calls']} "
+        f"({savings['hit_rate'] * 100:.1f}%), сэкономлено ${savings['saved_usd']}\n"
+    )
+
+    updates = get_update_stats()
+    text += (
+        f"\n🗄 <b>SQL на апдейт</b>: в среднем {updates['avg_queries']}, "
+        f"максимум {updates['max_queries']}, тяжёлых {updates['slow']} из {updates['updates']}, "
+        f"откатов {updates['rollbacks']}\n"
+    )
+
+    text += "\n🌐 <b>OpenRouter</b>\n"
+    for model, item in get_openrouter_stats().items():
+        text += (
+            f"• {model}: {item['calls']} выз., {item['avg_latency_ms']}ms "
+            f"(TTFB {item['avg_ttfb_ms']}ms), повторов {item['retries']}, ошибок {item['errors']}\n"
+        )
+
+    await update.message.reply_text(text, parse_mode="HTML")
+
+
 def register_handlers(application: Application) -> None:
     """Регистрация обработчиков."""
     application.add_handler(CommandHandler("today", today_command))
     application.add_handler(CommandHandler("admin_costs", admin_costs_command))
     application.add_handler(CommandHandler("tokens", tokens_command))
+    application.add_handler(CommandHandler("perf", perf_command))
     application.add_handler(CallbackQueryHandler(stats_callback, pattern=r"^stats:"))
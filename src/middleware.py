@@ -0,0 +1,93 @@
+"""Обработка апдейтов: одна сессия БД на апдейт, счётчик SQL-запросов."""
+import logging
+import time
+from typing import Any, Awaitable, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from telegram import Update
+from telegram.ext import Application, CallbackContext, ExtBot, SimpleUpdateProcessor
+from src.config import config
+from src.database import get_current_session, mark_update_failed, update_session
+
+logger = logging.getLogger(__name__)
+
+# Счётчики с момента запуска
+_stats = {"updates": 0, "queries": 0, "max_queries": 0, "slow": 0, "rollbacks": 0}
+
+
+class BotContext(CallbackContext[ExtBot, dict, dict, dict]):
+    """Контекст обработчика с сессией БД текущего апдейта."""
+
+    @property
+    def db(self) -> AsyncSession:
+        """Общая сессия апдейта (commit/rollback — после обработчиков)."""
+        session = get_current_session()
+        if session is None:
+            raise RuntimeError("No database session: update is not processed by DbUpdateProcessor")
+        return session
+
+
+def _describe(update: object) -> str:
+    """Короткое описание апдейта для лога."""
+    if not isinstance(update, Update):
+        return type(update).__name__
+    if update.callback_query:
+        return f"callback {update.callback_query.data!r}"
+    if update.message:
+        if update.message.photo:
+            return "photo"
+        if update.message.text:
+            return f"text {update.message.text[:30]!r}"
+    return f"update {update.update_id}"
+
+
+class DbUpdateProcessor(SimpleUpdateProcessor):
+    """Оборачивает обработку апдейта в update_session.
+
+    Все сервисы внутри апдейта работают в одной сессии и одной
+    транзакции; апдейты с числом запросов выше SLOW_UPDATE_QUERIES
+    логируются.
+    """
+
+    def __init__(self, max_concurrent_updates: int, slow_update_queries: int):
+        super().__init__(max_concurrent_updates)
+        self.slow_update_queries = slow_update_queries
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        started = time.perf_counter()
+        async with update_session() as stats:
+            await coroutine
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        _stats["updates"] += 1
+        _stats["queries"] += stats["queries"]
+        _stats["max_queries"] = max(_stats["max_queries"], stats["queries"])
+        _stats["rollbacks"] += stats["failed"]
+        if stats["queries"] > self.slow_update_queries:
+            _stats["slow"] += 1
+            logger.warning(
+                f"{_describe(update)}: {stats['queries']} SQL queries in {elapsed_ms:.0f}ms"
+            )
+
+
+async def error_handler(update: Optional[object], context: CallbackContext) -> None:
+    """Ошибка в обработчике: откатить транзакцию апдейта и залогировать."""
+    mark_update_failed()
+    logger.error(f"Error while handling {_describe(update)}", exc_info=context.error)
+
+
+def get_update_processor() -> DbUpdateProcessor:
+    """Обработчик апдейтов с настройками из конфига."""
+    return DbUpdateProcessor(config.MAX_CONCURRENT_UPDATES, config.SLOW_UPDATE_QUERIES)
+
+
+def register_handlers(application: Application) -> None:
+    """Регистрация обработчика ошибок."""
+    application.add_error_handler(error_handler)
+
+
+def get_update_stats() -> dict:
+    """Среднее и максимальное число SQL-запросов на апдейт."""
+    return {
+        **_stats,
+        "avg_queries": round(_stats["queries"] / _stats["updates"], 1) if _stats["updates"] else 0.0,
+    }
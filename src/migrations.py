@@ -0,0 +1,87 @@
+"""Версионные миграции схемы БД (применяются при запуске бота).
+
+create_all создаёт только недостающие таблицы: новые колонки и индексы
+в существующей базе добавляются миграциями отсюда. Каждая миграция
+выполняется в своей транзакции и записывается в schema_migrations.
+"""
+import logging
+from datetime import datetime
+from typing import Callable, Optional
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, select, text
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String(200), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+# version → (описание, функция)
+_MIGRATIONS: dict[int, tuple[str, Callable[[Connection], None]]] = {}
+
+
+def migration(version: int, description: str):
+    """Зарегистрировать миграцию. Версии применяются по возрастанию."""
+
+    def decorator(func: Callable[[Connection], None]) -> Callable[[Connection], None]:
+        if version in _MIGRATIONS:
+            raise ValueError(f"Duplicate migration version {version}")
+        _MIGRATIONS[version] = (description, func)
+        return func
+
+    return decorator
+
+
+@migration(1, "Составные индексы (user_id, created_at) для логов")
+def _add_user_created_indexes(conn: Connection) -> None:
+    for table in ("food_logs", "weight_logs", "ai_usage_logs"):
+        conn.execute(
+            text(
+                f"CREATE INDEX IF NOT EXISTS ix_{table}_user_id_created_at "
+                f"ON {table} (user_id, created_at)"
+            )
+        )
+
+
+def get_schema_version(conn: Connection) -> int:
+    """Последняя применённая миграция (0 — ни одной)."""
+    versions = conn.execute(select(schema_migrations.c.version)).scalars().all()
+    return max(versions, default=0)
+
+
+def run_migrations(engine: Engine, target: Optional[int] = None) -> list[int]:
+    """Применить все неприменённые миграции.
+
+    Args:
+        engine: синхронный движок
+        target: до какой версии применять (по умолчанию — все)
+
+    Returns:
+        Список применённых версий
+    """
+    _metadata.create_all(engine)
+
+    with engine.connect() as conn:
+        applied = set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+    done = []
+    for version in sorted(_MIGRATIONS):
+        if version in applied or (target is not None and version > target):
+            continue
+        description, func = _MIGRATIONS[version]
+        with engine.begin() as conn:
+            func(conn)
+            conn.execute(
+                schema_migrations.insert().values(
+                    version=version, description=description, applied_at=datetime.utcnow()
+                )
+            )
+        logger.info(f"Migration {version} applied: {description}")
+        done.append(version)
+    return done
@@ -6,6 +6,8 @@ from src.models.food_log import FoodLog
 from src.models.weight_log import WeightLog
 from src.models.ai_usage_log import AIUsageLog
 from src.models.food_cache import FoodCache
+from src.models.label_scan import LabelScan
+from src.models.edit_command_cache import EditCommandCache
 
 __all__ = [
     "BaseModel",
@@ -19,4 +21,6 @@ __all__ = [
     "WeightLog",
     "AIUsageLog",
     "FoodCache",
+    "LabelScan",
+    "EditCommandCache",
 ]
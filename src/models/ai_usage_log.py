@@ -1,5 +1,5 @@
 """Модель для логирования AI-запросов и их стоимости."""
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from src.models.base import BaseModel
@@ -9,11 +9,15 @@ class AIUsageLog(BaseModel):
     """Лог использования AI-сервисов с точной стоимостью."""
 
     __tablename__ = "ai_usage_logs"
+    __table_args__ = (
+        # Все выборки — по пользователю за период
+        Index("ix_ai_usage_logs_user_id_created_at", "user_id", "created_at"),
+    )
 
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     
     # Тип запроса
-    request_type = Column(String(50), nullable=False)  # vision, gemma, barcode, ocr
+    request_type = Column(String(50), nullable=False)  # vision, gemma, gemma_cache, barcode, ocr
     
     # Модель AI
     model = Column(String(100), nullable=False)  # gpt-4-vision, gemma-2b, etc
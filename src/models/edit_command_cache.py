@@ -0,0 +1,31 @@
+"""Модель кеша разобранных команд редактирования (ответы Gemma)."""
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime
+from src.models.base import BaseModel
+
+
+class EditCommandCache(BaseModel):
+    """Ответ Gemma на команду редактирования.
+
+    Одинаковые фразы с тем же списком продуктов
+    берутся отсюда без повторного запроса к модели.
+    """
+
+    __tablename__ = "edit_command_cache"
+
+    # SHA-256 от нормализованного текста и списка продуктов
+    key = Column(String(64), unique=True, nullable=False, index=True)
+
+    # Нормализованный текст команды (для отладки)
+    text = Column(String(500), nullable=False)
+
+    # Результат parse_edit_command в JSON
+    result = Column(Text, nullable=False)
+
+    # Стоимость исходного запроса — столько экономит каждое попадание
+    cost_usd = Column(Float, default=0.0)
+    tokens_input = Column(Integer, default=0)
+    tokens_output = Column(Integer, default=0)
+
+    # Попадания и последнее использование (для LRU)
+    hits = Column(Integer, default=0)
+    last_used_at = Column(DateTime(timezone=True))
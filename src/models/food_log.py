@@ -1,5 +1,5 @@
 """Модель записи о приеме пищи."""
-from sqlalchemy import Column, Integer, String, Float, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from src.models.base import BaseModel
 
@@ -8,6 +8,10 @@ class FoodLog(BaseModel):
     """Запись о съеденной еде."""
 
     __tablename__ = "food_logs"
+    __table_args__ = (
+        # Все выборки — по пользователю за период
+        Index("ix_food_logs_user_id_created_at", "user_id", "created_at"),
+    )
 
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
 
@@ -0,0 +1,26 @@
+"""Модель распознанных этикеток (кеш OCR по хешу фото)."""
+from sqlalchemy import Column, Integer, String, ForeignKey, Text
+from sqlalchemy.orm import relationship
+from src.models.base import BaseModel
+
+
+class LabelScan(BaseModel):
+    """Результат OCR этикетки.
+
+    Повторное фото той же этикетки находится по хешу
+    и берёт нутриенты из FoodCache без запуска Tesseract.
+    """
+
+    __tablename__ = "label_scans"
+
+    # SHA-256 байтов фото
+    image_hash = Column(String(64), unique=True, nullable=False, index=True)
+
+    # Куда сохранили распознанные нутриенты
+    food_cache_id = Column(Integer, ForeignKey("food_cache.id"), nullable=False)
+
+    # Сырой текст Tesseract (для отладки парсера)
+    raw_text = Column(Text)
+
+    # Relationship
+    food = relationship("FoodCache")
@@ -1,5 +1,5 @@
 """Модель записи веса пользователя."""
-from sqlalchemy import Column, Integer, Float, ForeignKey, Text
+from sqlalchemy import Column, Integer, Float, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from src.models.base import BaseModel
 
@@ -8,6 +8,10 @@ class WeightLog(BaseModel):
     """История изменения веса."""
 
     __tablename__ = "weight_logs"
+    __table_args__ = (
+        # Все выборки — по пользователю за период
+        Index("ix_weight_logs_user_id_created_at", "user_id", "created_at"),
+    )
 
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
 
@@ -1,7 +1,8 @@
 """Сервис для логирования AI-запросов и расчёта стоимости."""
 import logging
 from typing import Optional
-from src.database import get_db
+from sqlalchemy import select, func
+from src.database import AsyncSessionLocal, get_async_db
 from src.models import AIUsageLog
 
 logger = logging.getLogger(__name__)
@@ -10,11 +11,22 @@ logger = logging.getLogger(__name__)
 # OpenRouter возвращает точную стоимость, но на всякий случай — fallback цены
 MODEL_PRICING = {
     "openai/gpt-4-vision-preview": {"input": 0.01, "output": 0.03},
+    "openai/gpt-4o": {"input": 0.005, "output": 0.015},
+    "openai/gpt-4o-mini": {"input": 0.00015, "output": 0.0006},
     "google/gemma-2b-it": {"input": 0.0001, "output": 0.0001},
+    "google/gemma-2-9b-it": {"input": 0.0001, "output": 0.0001},
 }
 
 
-def log_ai_request(
+def estimate_cost(model: str, tokens_input: int, tokens_output: int) -> float:
+    """Оценить стоимость по токенам, если OpenRouter не вернул точную."""
+    prices = MODEL_PRICING.get(model)
+    if not prices:
+        return 0.0
+    return (tokens_input * prices["input"] + tokens_output * prices["output"]) / 1000
+
+
+async def log_ai_request(
     user_id: int,
     request_type: str,
     model: str,
@@ -28,7 +40,7 @@ def log_ai_request(
     
     Args:
         user_id: ID пользователя в базе
-        request_type: тип запроса (vision, gemma, barcode, ocr)
+        request_type: тип запроса (vision, gemma, gemma_cache, barcode, ocr)
         model: модель AI
         cost_usd: точная стоимость из ответа API
         tokens_input: входящие токены
@@ -36,7 +48,8 @@ def log_ai_request(
         food_name: название еды (опционально)
     """
     try:
-        with get_db() as db:
+        # Своя сессия: расход должен сохраниться, даже если апдейт откатится
+        async with AsyncSessionLocal() as db:
             log = AIUsageLog(
                 user_id=user_id,
                 request_type=request_type,
@@ -47,13 +60,13 @@ def log_ai_request(
                 food_name=food_name,
             )
             db.add(log)
-            db.commit()
+            await db.commit()
             logger.info(f"AI usage logged: {request_type} ${cost_usd:.4f} for user {user_id}")
     except Exception as e:
         logger.error(f"Failed to log AI usage: {e}")
 
 
-def get_user_ai_costs(user_id: int, days: int = 30) -> dict:
+async def get_user_ai_costs(user_id: int, days: int = 30) -> dict:
     """
     Получить статистику расходов на AI для пользователя.
     
@@ -66,13 +79,16 @@ def get_user_ai_costs(user_id: int, days: int = 30) -> dict:
     """
     from datetime import datetime, timedelta
     
-    with get_db() as db:
+    async with get_async_db() as db:
         start_date = datetime.utcnow() - timedelta(days=days)
         
-        logs = db.query(AIUsageLog).filter(
-            AIUsageLog.user_id == user_id,
-            AIUsageLog.created_at >= start_date,
-        ).all()
+        result = await db.execute(
+            select(AIUsageLog).where(
+                AIUsageLog.user_id == user_id,
+                AIUsageLog.created_at >= start_date,
+            )
+        )
+        logs = result.scalars().all()
         
         total_cost = sum(log.cost_usd for log in logs)
         request_count = len(logs)
@@ -90,7 +106,7 @@ def get_user_ai_costs(user_id: int, days: int = 30) -> dict:
         }
 
 
-def get_all_users_costs(days: int = 30) -> list:
+async def get_all_users_costs(days: int = 30) -> list:
     """
     Получить расходы всех пользователей (для админа).
     
@@ -98,21 +114,24 @@ def get_all_users_costs(days: int = 30) -> list:
         list словарей с user_id, username, total_cost, request_count
     """
     from datetime import datetime, timedelta
-    from sqlalchemy import func
     from src.models import User
     
-    with get_db() as db:
+    async with get_async_db() as db:
         start_date = datetime.utcnow() - timedelta(days=days)
         
-        results = db.query(
-            AIUsageLog.user_id,
-            User.username,
-            User.first_name,
-            func.sum(AIUsageLog.cost_usd).label("total_cost"),
-            func.count(AIUsageLog.id).label("request_count"),
-        ).join(User).filter(
-            AIUsageLog.created_at >= start_date,
-        ).group_by(AIUsageLog.user_id, User.username, User.first_name).all()
+        rows = await db.execute(
+            select(
+                AIUsageLog.user_id,
+                User.username,
+                User.first_name,
+                func.sum(AIUsageLog.cost_usd).label("total_cost"),
+                func.count(AIUsageLog.id).label("request_count"),
+            )
+            .join(User)
+            .where(AIUsageLog.created_at >= start_date)
+            .group_by(AIUsageLog.user_id, User.username, User.first_name)
+        )
+        results = rows.all()
         
         return [
             {
@@ -126,21 +145,22 @@ def get_all_users_costs(days: int = 30) -> list:
         ]
 
 
-def get_total_costs(days: int = 30) -> dict:
+async def get_total_costs(days: int = 30) -> dict:
     """Получить общие расходы на AI за период."""
     from datetime import datetime, timedelta
-    from sqlalchemy import func
     
-    with get_db() as db:
+    async with get_async_db() as db:
         start_date = datetime.utcnow() - timedelta(days=days)
         
-        total = db.query(func.sum(AIUsageLog.cost_usd)).filter(
-            AIUsageLog.created_at >= start_date,
-        ).scalar() or 0
-        
-        count = db.query(func.count(AIUsageLog.id)).filter(
-            AIUsageLog.created_at >= start_date,
-        ).scalar() or 0
+        row = (
+            await db.execute(
+                select(func.sum(AIUsageLog.cost_usd), func.count(AIUsageLog.id)).where(
+                    AIUsageLog.created_at >= start_date,
+                )
+            )
+        ).one()
+        total = row[0] or 0
+        count = row[1] or 0
         
         return {
             "total_cost_usd": round(total, 4),
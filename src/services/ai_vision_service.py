@@ -1,11 +1,9 @@
 """Сервис AI Vision для распознавания еды по фото."""
 import base64
-import json
 import logging
 from typing import TypedDict, Optional
-import requests
-from src.config import config
 from src.services.ai_cost_service import log_ai_request
+from src.services.openrouter_client import get_openrouter_client, extract_json_content
 
 logger = logging.getLogger(__name__)
 
@@ -30,7 +28,9 @@ class AIVisionResult(TypedDict):
     confidence: str  # high, medium, low
 
 
-def analyze_food_photo(photo_bytes: bytes, user_id: Optional[int] = None) -> AIVisionResult:
+async def analyze_food_photo(
+    photo_bytes: bytes, user_id: Optional[int] = None
+) -> AIVisionResult:
     """
     Анализ фото еды через GPT-4 Vision.
 
@@ -78,70 +78,39 @@ def analyze_food_photo(photo_bytes: bytes, user_id: Optional[int] = None) -> AIV
 - low: непонятно что это"""
 
     try:
-        response = requests.post(
-            "https://openrouter.ai/api/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {config.OPENROUTER_API_KEY}",
-                "Content-Type": "application/json",
-                "HTTP-Referer": "https://diet-bot.local",
-                "X-Title": "Diet Bot",
-            },
-            json={
-                "model": "openai/gpt-4o",
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "image_url",
-                                "image_url": {"url": f"data:image/jpeg;base64,{image_base64}"},
-                            }
-                        ],
-                    },
-                ],
-                "max_tokens": 1000,
-                "temperature": 0.3,
-            },
-            timeout=30,
+        model = "openai/gpt-4o"
+        response = await get_openrouter_client().chat(
+            model=model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {
+                    "role": "user",
+                    "content": [
+                        {
+                            "type": "image_url",
+                            "image_url": {"url": f"data:image/jpeg;base64,{image_base64}"},
+                        }
+                    ],
+                },
+            ],
+            max_tokens=1000,
+            temperature=0.3,
+            operation="photo_analysis",
+            user_id=user_id,
         )
 
-        response.raise_for_status()
-        data = response.json()
-
         # Логируем стоимость запроса
         if user_id:
-            try:
-                usage = data.get("usage", {})
-                # OpenRouter возвращает cost в поле usage.cost или считаем по токенам
-                cost = data.get("cost", 0)  # OpenRouter иногда добавляет поле cost
-                if not cost and usage:
-                    # Приблизительный расчет: $0.005/1K input, $0.015/1K output для GPT-4o
-                    input_tokens = usage.get("prompt_tokens", 0)
-                    output_tokens = usage.get("completion_tokens", 0)
-                    cost = (input_tokens * 0.000005) + (output_tokens * 0.000015)
-                
-                log_ai_request(
-                    user_id=user_id,
-                    request_type="vision",
-                    model="openai/gpt-4o",
-                    cost_usd=cost,
-                    tokens_input=usage.get("prompt_tokens", 0),
-                    tokens_output=usage.get("completion_tokens", 0),
-                )
-            except Exception as e:
-                logger.error(f"Failed to log AI cost: {e}")
-
-        # Парсим ответ AI
-        ai_content = data["choices"][0]["message"]["content"]
-
-        # Убираем markdown code blocks если есть
-        if "```json" in ai_content:
-            ai_content = ai_content.split("```json")[1].split("```")[0]
-        elif "```" in ai_content:
-            ai_content = ai_content.split("```")[1].split("```")[0]
-
-        ai_result = json.loads(ai_content.strip())
+            await log_ai_request(
+                user_id=user_id,
+                request_type="vision",
+                model=model,
+                cost_usd=response["cost_usd"],
+                tokens_input=response["tokens_input"],
+                tokens_output=response["tokens_output"],
+            )
+
+        ai_result = extract_json_content(response["content"])
 
         # Конвертируем в наш формат
         foods = []
@@ -0,0 +1,227 @@
+"""Кеш ответов Gemma на команды редактирования (LRU + TTL, хранится в БД)."""
+import hashlib
+import json
+import logging
+import re
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import func
+from src.database import get_db
+from src.models import AIUsageLog, EditCommandCache
+
+logger = logging.getLogger(__name__)
+
+# Сколько команд держать в памяти и в БД
+EDIT_CACHE_SIZE = 2000
+
+# Через сколько ответ модели считается устаревшим (например, поменяли промпт)
+EDIT_CACHE_TTL = timedelta(days=30)
+
+# Тип записи в AIUsageLog для попадания в кеш
+CACHE_REQUEST_TYPE = "gemma_cache"
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+
+# key → {"result", "cost_usd", "tokens_input", "tokens_output", "created_at"}
+_entries: OrderedDict[str, dict] = OrderedDict()
+_loaded = False
+_stats = {"hits": 0, "misses": 0}
+
+
+def normalize_edit_text(text: str) -> str:
+    """Регистр, «ё», пунктуация и лишние пробелы не влияют на ответ модели."""
+    text = _PUNCTUATION_RE.sub(" ", text.lower().replace("ё", "е"))
+    return " ".join(text.split())
+
+
+def make_cache_key(text: str, available_foods: Optional[list[str]]) -> str:
+    """Ключ: нормализованный текст + продукты в исходном порядке (важно для «второе»)."""
+    payload = json.dumps(
+        [normalize_edit_text(text), list(available_foods or [])], ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _is_expired(created_at: Optional[datetime]) -> bool:
+    if created_at is None:
+        return False
+    return datetime.utcnow() - created_at.replace(tzinfo=None) > EDIT_CACHE_TTL
+
+
+def _load() -> None:
+    """Поднять из БД последние использованные записи (после рестарта)."""
+    global _loaded
+    _loaded = True
+    try:
+        with get_db() as db:
+            threshold = datetime.utcnow() - EDIT_CACHE_TTL
+            db.query(EditCommandCache).filter(EditCommandCache.created_at < threshold).delete()
+            db.commit()
+
+            rows = (
+                db.query(EditCommandCache)
+                .order_by(
+                    func.coalesce(
+                        EditCommandCache.last_used_at, EditCommandCache.created_at
+                    ).desc()
+                )
+                .limit(EDIT_CACHE_SIZE)
+                .all()
+            )
+            # Самые свежие — в конец OrderedDict
+            for row in reversed(rows):
+                _entries[row.key] = {
+                    "result": json.loads(row.result),
+                    "cost_usd": row.cost_usd or 0.0,
+                    "tokens_input": row.tokens_input or 0,
+                    "tokens_output": row.tokens_output or 0,
+                    "created_at": row.created_at,
+                }
+        logger.info(f"Edit cache loaded: {len(_entries)} entries")
+    except Exception as e:
+        logger.error(f"Failed to load edit cache: {e}")
+
+
+def _evict(keys: list[str]) -> None:
+    try:
+        with get_db() as db:
+            db.query(EditCommandCache).filter(EditCommandCache.key.in_(keys)).delete(
+                synchronize_session=False
+            )
+            db.commit()
+    except Exception as e:
+        logger.error(f"Failed to evict edit cache entries: {e}")
+
+
+def get_cached_edit(key: str) -> Optional[dict]:
+    """Ответ из кеша или None.
+
+    Returns:
+        dict с result, cost_usd, tokens_input, tokens_output
+    """
+    if not _loaded:
+        _load()
+
+    entry = _entries.get(key)
+    if entry is None or _is_expired(entry["created_at"]):
+        if entry is not None:
+            del _entries[key]
+            _evict([key])
+        _stats["misses"] += 1
+        return None
+
+    _entries.move_to_end(key)
+    _stats["hits"] += 1
+    try:
+        with get_db() as db:
+            db.query(EditCommandCache).filter(EditCommandCache.key == key).update(
+                {
+                    EditCommandCache.hits: EditCommandCache.hits + 1,
+                    EditCommandCache.last_used_at: datetime.utcnow(),
+                },
+                synchronize_session=False,
+            )
+            db.commit()
+    except Exception as e:
+        logger.error(f"Failed to update edit cache hit: {e}")
+    return entry
+
+
+def store_edit(
+    key: str,
+    text: str,
+    result: dict,
+    cost_usd: float,
+    tokens_input: int,
+    tokens_output: int,
+) -> None:
+    """Сохранить ответ Gemma в память и в БД, вытеснив самые старые записи."""
+    if not _loaded:
+        _load()
+
+    now = datetime.utcnow()
+    _entries[key] = {
+        "result": result,
+        "cost_usd": cost_usd,
+        "tokens_input": tokens_input,
+        "tokens_output": tokens_output,
+        "created_at": now,
+    }
+    _entries.move_to_end(key)
+
+    evicted = []
+    while len(_entries) > EDIT_CACHE_SIZE:
+        evicted.append(_entries.popitem(last=False)[0])
+
+    try:
+        with get_db() as db:
+            row = db.query(EditCommandCache).filter(EditCommandCache.key == key).first()
+            if row is None:
+                row = EditCommandCache(key=key, text=normalize_edit_text(text)[:500])
+                db.add(row)
+            row.result = json.dumps(result, ensure_ascii=False)
+            row.cost_usd = cost_usd
+            row.tokens_input = tokens_input
+            row.tokens_output = tokens_output
+            row.hits = 0
+            row.last_used_at = now
+            db.commit()
+    except Exception as e:
+        logger.error(f"Failed to store edit cache entry: {e}")
+
+    if evicted:
+        _evict(evicted)
+
+
+def clear_edit_cache() -> None:
+    """Сбросить кеш в памяти (следующий запрос перечитает БД)."""
+    global _loaded
+    _entries.clear()
+    _loaded = False
+    _stats.update(hits=0, misses=0)
+
+
+def get_edit_cache_stats() -> dict:
+    """Попадания в кеш с момента запуска бота."""
+    total = _stats["hits"] + _stats["misses"]
+    return {
+        "size": len(_entries),
+        "hits": _stats["hits"],
+        "misses": _stats["misses"],
+        "hit_rate": round(_stats["hits"] / total, 3) if total else 0.0,
+    }
+
+
+def get_edit_cache_savings(days: int = 30) -> dict:
+    """Экономия на Gemma по AIUsageLog за период.
+
+    Попадание в кеш логируется с нулевой стоимостью и токенами исходного
+    запроса, сэкономленная сумма — средняя цена реального запроса Gemma.
+    """
+    with get_db() as db:
+        start_date = datetime.utcnow() - timedelta(days=days)
+        rows = (
+            db.query(
+                AIUsageLog.request_type,
+                func.count(AIUsageLog.id),
+                func.sum(AIUsageLog.cost_usd),
+            )
+            .filter(
+                AIUsageLog.created_at >= start_date,
+                AIUsageLog.request_type.in_(["gemma", CACHE_REQUEST_TYPE]),
+            )
+            .group_by(AIUsageLog.request_type)
+            .all()
+        )
+
+    counts = {request_type: (count, cost or 0.0) for request_type, count, cost in rows}
+    calls, cost = counts.get("gemma", (0, 0.0))
+    hits = counts.get(CACHE_REQUEST_TYPE, (0, 0.0))[0]
+    total = calls + hits
+    return {
+        "gemma_calls": calls,
+        "cache_hits": hits,
+        "hit_rate": round(hits / total, 3) if total else 0.0,
+        "saved_usd": round(hits * cost / calls, 4) if calls else 0.0,
+    }
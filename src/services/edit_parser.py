@@ -0,0 +1,301 @@
+"""Локальный разбор команд редактирования без обращения к Gemma.
+
+Понимает самые частые формы: «250 грамм», «сто пятьдесят граммов»,
+«300 ккал», «хочу рис вместо гречки», «не гречка, а рис».
+Возвращает тот же формат, что gemma_service.parse_edit_command,
+плюс уверенность разбора: при низкой уверенности вызывается Gemma.
+"""
+import re
+from typing import Optional
+
+# Ниже этой уверенности результат не используем и идём в Gemma
+FAST_PATH_MIN_CONFIDENCE = 0.8
+
+_UNITS = {
+    "ноль": 0, "один": 1, "одна": 1, "одно": 1, "одного": 1, "одной": 1,
+    "два": 2, "две": 2, "двух": 2, "три": 3, "трех": 3, "четыре": 4, "четырех": 4,
+    "пять": 5, "пяти": 5, "шесть": 6, "шести": 6, "семь": 7, "семи": 7,
+    "восемь": 8, "восьми": 8, "девять": 9, "девяти": 9,
+}  # fmt: skip
+
+_TEENS = {
+    "десять": 10, "десяти": 10, "одиннадцать": 11, "одиннадцати": 11,
+    "двенадцать": 12, "двенадцати": 12, "тринадцать": 13, "тринадцати": 13,
+    "четырнадцать": 14, "четырнадцати": 14, "пятнадцать": 15, "пятнадцати": 15,
+    "шестнадцать": 16, "шестнадцати": 16, "семнадцать": 17, "семнадцати": 17,
+    "восемнадцать": 18, "восемнадцати": 18, "девятнадцать": 19, "девятнадцати": 19,
+}  # fmt: skip
+
+_TENS = {
+    "двадцать": 20, "двадцати": 20, "тридцать": 30, "тридцати": 30,
+    "сорок": 40, "сорока": 40, "пятьдесят": 50, "пятидесяти": 50,
+    "шестьдесят": 60, "шестидесяти": 60, "семьдесят": 70, "семидесяти": 70,
+    "восемьдесят": 80, "восьмидесяти": 80, "девяносто": 90, "девяноста": 90,
+}  # fmt: skip
+
+_HUNDREDS = {
+    "сто": 100, "ста": 100, "полтораста": 150, "двести": 200, "двухсот": 200,
+    "триста": 300, "трехсот": 300, "четыреста": 400, "четырехсот": 400,
+    "пятьсот": 500, "пятисот": 500, "шестьсот": 600, "шестисот": 600,
+    "семьсот": 700, "семисот": 700, "восемьсот": 800, "восьмисот": 800,
+    "девятьсот": 900, "девятисот": 900,
+}  # fmt: skip
+
+_THOUSANDS = {"тысяча", "тысячи", "тысяч", "тысячу", "тыща", "тыщи", "тыщ"}
+
+# «полторы тысячи» = 1500
+_THOUSAND_MULTIPLIERS = {**_UNITS, "полторы": 1.5, "полтора": 1.5}
+
+_ORDINALS = {
+    "перв": "первое",
+    "втор": "второе",
+    "трет": "третье",
+    "четверт": "четвертое",
+    "пят": "пятое",
+    "последн": "последнее",
+}
+
+# Слова, которые не относятся к названию продукта
+_FILLER_WORDS = {
+    "хочу", "давай", "поставь", "запиши", "пусть", "будет", "это", "было", "был",
+    "была", "я", "ел", "ела", "съел", "съела", "надо", "нужно", "там", "а", "на",
+    "не", "замени", "поменяй", "измени", "смени", "исправь", "пожалуйста",
+}  # fmt: skip
+
+_TOKEN_RE = re.compile(r"\d+(?:[.,]\d+)?|[a-zа-я]+")
+
+# Счётчики быстрого пути с момента запуска
+_stats = {"fast": 0, "fallback": 0}
+
+
+def _tokenize(text: str) -> list[str]:
+    return _TOKEN_RE.findall(text.lower().replace("ё", "е"))
+
+
+def _parse_below_thousand(tokens: list[str], i: int) -> tuple[Optional[int], int]:
+    """Сотни → десятки → единицы (или 10-19), каждая часть не больше одного раза."""
+    value = None
+    if i < len(tokens) and tokens[i] in _HUNDREDS:
+        value = _HUNDREDS[tokens[i]]
+        i += 1
+    if i < len(tokens) and tokens[i] in _TENS:
+        value = (value or 0) + _TENS[tokens[i]]
+        i += 1
+        if i < len(tokens) and tokens[i] in _UNITS and _UNITS[tokens[i]]:
+            value += _UNITS[tokens[i]]
+            i += 1
+    elif i < len(tokens) and tokens[i] in _TEENS:
+        value = (value or 0) + _TEENS[tokens[i]]
+        i += 1
+    elif i < len(tokens) and tokens[i] in _UNITS:
+        value = (value or 0) + _UNITS[tokens[i]]
+        i += 1
+    return value, i
+
+
+def _parse_numeral(tokens: list[str], i: int) -> tuple[Optional[int], int]:
+    """Разобрать число прописью, начиная с tokens[i].
+
+    Returns:
+        (значение, индекс после числа) или (None, i)
+    """
+    start = i
+    if i < len(tokens) and tokens[i] in _THOUSAND_MULTIPLIERS and (
+        i + 1 < len(tokens) and tokens[i + 1] in _THOUSANDS
+    ):
+        multiplier = _THOUSAND_MULTIPLIERS[tokens[i]]
+        i += 1
+    else:
+        multiplier = None
+
+    if i < len(tokens) and tokens[i] in _THOUSANDS:
+        total = int((multiplier or 1) * 1000)
+        rest, i = _parse_below_thousand(tokens, i + 1)
+        return total + (rest or 0), i
+
+    if multiplier is not None:
+        i = start
+
+    value, i = _parse_below_thousand(tokens, i)
+    if value is None:
+        return None, start
+    return value, i
+
+
+def _find_numbers(tokens: list[str]) -> list[tuple[float, int, int]]:
+    """Все числа в тексте: (значение, индекс начала, индекс после конца)."""
+    numbers = []
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token[0].isdigit():
+            numbers.append((float(token.replace(",", ".")), i, i + 1))
+            i += 1
+            continue
+        value, end = _parse_numeral(tokens, i)
+        if value is not None:
+            numbers.append((value, i, end))
+            i = end
+        else:
+            i += 1
+    return numbers
+
+
+def parse_russian_number(text: str) -> Optional[int]:
+    """Первое число в тексте (цифрами или прописью).
+
+    «сто пятьдесят» → 150, «семнадцать» → 17, «две тысячи триста» → 2300.
+    """
+    numbers = _find_numbers(_tokenize(text))
+    return int(numbers[0][0]) if numbers else None
+
+
+def _unit_of(token: str) -> Optional[tuple[str, float]]:
+    """Единица измерения: (action, множитель к значению)."""
+    if token in ("г", "гр", "g") or token.startswith("грам") or token.startswith("gram"):
+        return "change_grams", 1
+    if token == "кг" or token.startswith("килограм") or token == "kg":
+        return "change_grams", 1000
+    if token in ("ккал", "кал", "kcal", "cal") or token.startswith("калори") or token.startswith(
+        "килокалори"
+    ):
+        return "change_calories", 1
+    return None
+
+
+def _normalize_word(word: str) -> str:
+    """Винительный падеж → именительный для типичных окончаний («гречку» → «гречка»)."""
+    if word.endswith("ую") and len(word) > 4:
+        return word[:-2] + "ая"
+    if word.endswith("юю") and len(word) > 4:
+        return word[:-2] + "яя"
+    if word.endswith("у") and len(word) >= 5 and word[-2] not in "аеиоуыэюя":
+        return word[:-1] + "а"
+    if word.endswith("ю") and len(word) >= 5 and word[-2] not in "аеиоуыэюя":
+        return word[:-1] + "я"
+    return word
+
+
+def _clean_product(tokens: list[str]) -> list[str]:
+    return [token for token in tokens if token not in _FILLER_WORDS and not token[0].isdigit()]
+
+
+def _match_food(words: list[str], available_foods: Optional[list[str]]) -> Optional[str]:
+    """Найти продукт из списка по основам слов (первые 4 буквы)."""
+    if not words or not available_foods:
+        return None
+    stems = {word[:4] for word in words if len(word) >= 3}
+    for food in available_foods:
+        food_stems = {word[:4] for word in _tokenize(food) if len(word) >= 3}
+        if stems & food_stems:
+            return food
+    return None
+
+
+def _find_target(tokens: list[str], available_foods: Optional[list[str]]) -> Optional[str]:
+    """Какой продукт меняем: по названию или порядковому номеру."""
+    for token in tokens:
+        for stem, ordinal in _ORDINALS.items():
+            if token.startswith(stem) and token[len(stem) :] in (
+                "ое", "ый", "ой", "ая", "ую", "ого", "ее", "ий", "яя", "юю", "ему",
+            ):  # fmt: skip
+                return ordinal
+    return _match_food(_clean_product(tokens), available_foods)
+
+
+def _result(action: str, confidence: float, **fields) -> dict:
+    return {
+        "action": action,
+        "value": fields.get("value"),
+        "target": fields.get("target"),
+        "new_product": fields.get("new_product"),
+        "clarification_needed": False,
+        "confidence": confidence,
+    }
+
+
+def _parse_product_change(
+    tokens: list[str], available_foods: Optional[list[str]]
+) -> Optional[dict]:
+    """«X вместо Y», «не Y, а X», «замени Y на X»."""
+    new_words, old_words = None, None
+
+    if "вместо" in tokens:
+        split = tokens.index("вместо")
+        new_words, old_words = _clean_product(tokens[:split]), _clean_product(tokens[split + 1 :])
+    elif tokens and tokens[0] == "не" and "а" in tokens:
+        split = tokens.index("а")
+        old_words, new_words = _clean_product(tokens[1:split]), _clean_product(tokens[split + 1 :])
+    elif tokens and tokens[0] in ("замени", "поменяй", "смени") and "на" in tokens:
+        split = tokens.index("на")
+        old_words, new_words = _clean_product(tokens[1:split]), _clean_product(tokens[split + 1 :])
+    else:
+        return None
+
+    if not new_words:
+        # «вместо гречки рис» — не понять, где какой продукт
+        return _result("change_product", 0.4)
+
+    target = _match_food(old_words, available_foods) or (" ".join(old_words) or None)
+    new_product = " ".join(_normalize_word(word) for word in new_words)
+    confidence = 0.9 if len(new_words) <= 3 and len(old_words or []) <= 3 else 0.5
+    return _result("change_product", confidence, target=target, new_product=new_product)
+
+
+def parse_edit_fast(text: str, available_foods: Optional[list[str]] = None) -> dict:
+    """Разобрать команду редактирования локально.
+
+    Args:
+        text: текст от пользователя
+        available_foods: продукты в текущей записи
+
+    Returns:
+        dict как у parse_edit_command + "confidence" (0..1).
+        Если confidence < FAST_PATH_MIN_CONFIDENCE — нужен Gemma.
+    """
+    tokens = _tokenize(text)
+    numbers = _find_numbers(tokens)
+
+    product_change = _parse_product_change(tokens, available_foods)
+    if product_change and not numbers:
+        result = product_change
+    elif len(numbers) != 1:
+        # Ни одного числа или несколько — без модели не разобраться
+        result = _result("unclear", 0.0 if not numbers else 0.3)
+    else:
+        value, start, end = numbers[0]
+        unit = _unit_of(tokens[end]) if end < len(tokens) else None
+        confidence = 0.95
+        if unit is None:
+            # Единица где-то в другом месте фразы: «калорий пусть будет 300»
+            units = [_unit_of(token) for token in tokens]
+            units = [item for item in units if item]
+            unit = units[0] if len(units) == 1 else None
+            confidence = 0.85
+        if unit is None:
+            # Голое число — скорее всего граммы, но уверенности нет
+            unit, confidence = ("change_grams", 1), 0.6
+        if product_change:
+            # Число вместе со сменой продукта — сложная фраза
+            confidence = 0.3
+
+        action, multiplier = unit
+        amount = int(round(value * multiplier))
+        if amount <= 0:
+            confidence = 0.0
+        target = _find_target(tokens[:start] + tokens[end:], available_foods)
+        result = _result(action, confidence, value=amount, target=target)
+
+    _stats["fast" if result["confidence"] >= FAST_PATH_MIN_CONFIDENCE else "fallback"] += 1
+    return result
+
+
+def get_fast_path_stats() -> dict:
+    """Доля команд, разобранных без Gemma, с момента запуска бота."""
+    total = _stats["fast"] + _stats["fallback"]
+    return {
+        "total": total,
+        "fast": _stats["fast"],
+        "fallback": _stats["fallback"],
+        "hit_rate": round(_stats["fast"] / total, 3) if total else 0.0,
+    }
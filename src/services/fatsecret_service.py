@@ -1,9 +1,11 @@
 """Сервис для работы с FatSecret API (OAuth 2.0) + Open Food Facts fallback."""
+import asyncio
 import requests
 import base64
 from typing import Optional
 from src.config import config
-from src.database import get_db
+from sqlalchemy import select
+from src.database import get_async_db
 from src.models import FoodCache
 import logging
 
@@ -154,6 +156,7 @@ class OpenFoodFactsService:
     """Fallback сервис через Open Food Facts (без OAuth)."""
 
     BASE_URL = "https://world.openfoodfacts.org/cgi/search.pl"
+    PRODUCT_URL = "https://world.openfoodfacts.org/api/v0/product/{barcode}.json"
 
     def search_food(self, query: str) -> Optional[dict]:
         """Поиск продукта в Open Food Facts."""
@@ -198,6 +201,39 @@ class OpenFoodFactsService:
             logger.error(f"Open Food Facts search error: {e}")
             return None
 
+    def get_product_by_barcode(self, barcode: str) -> Optional[dict]:
+        """Поиск продукта по штрих-коду (EAN/UPC)."""
+        try:
+            response = requests.get(self.PRODUCT_URL.format(barcode=barcode), timeout=10)
+            response.raise_for_status()
+            data = response.json()
+
+            if data.get("status") != 1:
+                return None
+
+            product = data.get("product", {})
+            nutriments = product.get("nutriments", {})
+
+            calories = (
+                nutriments.get("energy-kcal_100g")
+                or nutriments.get("energy-kcal")
+                or (nutriments.get("energy_100g", 0) / 4.184)
+            )
+
+            return {
+                "name": product.get("product_name_ru") or product.get("product_name") or barcode,
+                "calories": round(calories) if calories else 0,
+                "protein": nutriments.get("proteins_100g", 0) or 0,
+                "fat": nutriments.get("fat_100g", 0) or 0,
+                "carbs": nutriments.get("carbohydrates_100g", 0) or 0,
+                "fiber": nutriments.get("fiber_100g", 0) or 0,
+                "source": "openfoodfacts_barcode",
+            }
+
+        except Exception as e:
+            logger.error(f"Open Food Facts barcode error: {e}")
+            return None
+
 
 # Глобальные экземпляры
 _fatsecret_service: Optional[FatSecretService] = None
@@ -221,17 +257,20 @@ def get_openfoodfacts_service() -> OpenFoodFactsService:
     return _openfoodfacts_service
 
 
-def find_food_in_cache_or_api(food_name: str) -> Optional[dict]:
-    """Найти продукт: кеш → FatSecret → Open Food Facts."""
+async def find_food_in_cache_or_api(food_name: str) -> Optional[dict]:
+    """Найти продукт: кеш → FatSecret → Open Food Facts.
+
+    HTTP-клиенты синхронные (requests) — запросы идут в отдельном потоке.
+    """
     normalized_name = food_name.lower().strip()
 
     # ШАГ 1: Ищем в локальном кеше
-    with get_db() as db:
-        cached = db.query(FoodCache).filter(FoodCache.name == normalized_name).first()
+    async with get_async_db() as db:
+        result = await db.execute(select(FoodCache).where(FoodCache.name == normalized_name))
+        cached = result.scalars().first()
 
         if cached:
             cached.usage_count += 1
-            db.commit()
             logger.info(f"Cache hit for '{food_name}'")
             return cached.to_dict()
 
@@ -239,9 +278,9 @@ def find_food_in_cache_or_api(food_name: str) -> Optional[dict]:
     fs_service = get_fatsecret_service()
     if fs_service:
         try:
-            api_result = fs_service.search_food(food_name)
+            api_result = await asyncio.to_thread(fs_service.search_food, food_name)
             if api_result:
-                with get_db() as db:
+                async with get_async_db() as db:
                     cache_entry = FoodCache(
                         name=normalized_name,
                         calories=api_result["calories"],
@@ -253,7 +292,6 @@ def find_food_in_cache_or_api(food_name: str) -> Optional[dict]:
                         fatsecret_food_id=api_result.get("fatsecret_food_id"),
                     )
                     db.add(cache_entry)
-                    db.commit()
                     logger.info(f"Saved '{food_name}' to cache from FatSecret")
                 return api_result
         except Exception as e:
@@ -262,7 +300,7 @@ def find_food_in_cache_or_api(food_name: str) -> Optional[dict]:
     # ШАГ 3: Fallback на Open Food Facts (без сохранения в кеш)
     off_service = get_openfoodfacts_service()
     try:
-        off_result = off_service.search_food(food_name)
+        off_result = await asyncio.to_thread(off_service.search_food, food_name)
         if off_result:
             logger.info(f"Found '{food_name}' in Open Food Facts (not cached)")
             return off_result
@@ -273,6 +311,16 @@ def find_food_in_cache_or_api(food_name: str) -> Optional[dict]:
     return None
 
 
+def find_food_by_barcode(barcode: str) -> Optional[dict]:
+    """Найти продукт по штрих-коду через Open Food Facts."""
+    result = get_openfoodfacts_service().get_product_by_barcode(barcode)
+    if result:
+        logger.info(f"Barcode {barcode} → '{result['name']}'")
+    else:
+        logger.warning(f"Barcode not found: {barcode}")
+    return result
+
+
 def calculate_nutrition_for_weight(food_data: dict, grams: int) -> dict:
     """Рассчитать нутриенты для указанного веса."""
     ratio = grams / 100
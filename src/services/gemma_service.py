@@ -1,15 +1,24 @@
 """Сервис Gemma 2B для понимания естественного языка при редактировании."""
-import json
 import logging
 from typing import Optional
-import requests
-from src.config import config
 from src.services.ai_cost_service import log_ai_request
+from src.services.openrouter_client import get_openrouter_client, extract_json_content
+from src.services.edit_parser import parse_russian_number
+from src.services.edit_cache import (
+    CACHE_REQUEST_TYPE,
+    get_cached_edit,
+    make_cache_key,
+    store_edit,
+)
 
 logger = logging.getLogger(__name__)
 
+GEMMA_MODEL = "google/gemma-2-9b-it"
 
-def parse_edit_command(text: str, available_foods: list[str] = None, user_id: Optional[int] = None) -> dict:
+
+async def parse_edit_command(
+    text: str, available_foods: list[str] = None, user_id: Optional[int] = None
+) -> dict:
     """
     Анализирует текст редактирования через Gemma 2B.
 
@@ -54,63 +63,51 @@ def parse_edit_command(text: str, available_foods: list[str] = None, user_id: Op
 
 ЕСЛИ target null и доступно несколько продуктов — clarification_needed: true"""
 
+    # Та же фраза с тем же списком продуктов — ответ уже есть
+    cache_key = make_cache_key(text, available_foods)
+    cached = get_cached_edit(cache_key)
+    if cached:
+        if user_id:
+            await log_ai_request(
+                user_id=user_id,
+                request_type=CACHE_REQUEST_TYPE,
+                model=GEMMA_MODEL,
+                cost_usd=0.0,
+                tokens_input=cached["tokens_input"],
+                tokens_output=cached["tokens_output"],
+            )
+        return dict(cached["result"])
+
     foods_context = ""
     if available_foods:
         foods_context = f"\nДоступные продукты: {', '.join(available_foods)}"
 
     try:
-        response = requests.post(
-            "https://openrouter.ai/api/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {config.OPENROUTER_API_KEY}",
-                "Content-Type": "application/json",
-                "HTTP-Referer": "https://diet-bot.local",
-                "X-Title": "Diet Bot",
-            },
-            json={
-                "model": "google/gemma-2-9b-it",
-                "messages": [
-                    {"role": "system", "content": system_prompt + foods_context},
-                    {"role": "user", "content": f'"{text}"'},
-                ],
-                "max_tokens": 200,
-                "temperature": 0.1,
-            },
-            timeout=10,
+        model = GEMMA_MODEL
+        response = await get_openrouter_client().chat(
+            model=model,
+            messages=[
+                {"role": "system", "content": system_prompt + foods_context},
+                {"role": "user", "content": f'"{text}"'},
+            ],
+            max_tokens=200,
+            temperature=0.1,
+            operation="edit_parse",
+            user_id=user_id,
         )
 
-        response.raise_for_status()
-        data = response.json()
-
         # Логируем стоимость запроса
         if user_id:
-            try:
-                usage = data.get("usage", {})
-                # Gemma-2B: $0.0001/1K tokens
-                input_tokens = usage.get("prompt_tokens", 0)
-                output_tokens = usage.get("completion_tokens", 0)
-                cost = (input_tokens * 0.0000001) + (output_tokens * 0.0000001)
-                
-                log_ai_request(
-                    user_id=user_id,
-                    request_type="gemma",
-                    model="google/gemma-2-9b-it",
-                    cost_usd=cost,
-                    tokens_input=input_tokens,
-                    tokens_output=output_tokens,
-                )
-            except Exception as e:
-                logger.error(f"Failed to log Gemma cost: {e}")
-
-        ai_content = data["choices"][0]["message"]["content"]
-
-        # Убираем markdown code blocks если есть
-        if "```json" in ai_content:
-            ai_content = ai_content.split("```json")[1].split("```")[0]
-        elif "```" in ai_content:
-            ai_content = ai_content.split("```")[1].split("```")[0]
-
-        result = json.loads(ai_content.strip())
+            await log_ai_request(
+                user_id=user_id,
+                request_type="gemma",
+                model=model,
+                cost_usd=response["cost_usd"],
+                tokens_input=response["tokens_input"],
+                tokens_output=response["tokens_output"],
+            )
+
+        result = extract_json_content(response["content"])
 
         # Валидация
         if result.get("action") not in [
@@ -121,13 +118,22 @@ def parse_edit_command(text: str, available_foods: list[str] = None, user_id: Op
         ]:
             result["action"] = "unclear"
 
-        return {
+        parsed = {
             "action": result.get("action", "unclear"),
             "value": result.get("value"),
             "target": result.get("target"),
             "new_product": result.get("new_product"),
             "clarification_needed": result.get("clarification_needed", False),
         }
+        store_edit(
+            cache_key,
+            text,
+            parsed,
+            cost_usd=response["cost_usd"],
+            tokens_input=response["tokens_input"],
+            tokens_output=response["tokens_output"],
+        )
+        return dict(parsed)
 
     except Exception as e:
         logger.error(f"Gemma error: {e}")
@@ -145,54 +151,4 @@ def number_to_int(text: str) -> int | None:
     Преобразует числа прописью в цифры.
     fallback для Gemma если она не справилась.
     """
-    numbers = {
-        "ноль": 0,
-        "один": 1,
-        "одна": 1,
-        "два": 2,
-        "две": 2,
-        "три": 3,
-        "четыре": 4,
-        "пять": 5,
-        "шесть": 6,
-        "семь": 7,
-        "восемь": 8,
-        "девять": 9,
-        "десять": 10,
-        "одиннадцать": 11,
-        "двенадцать": 12,
-        "тринадцать": 13,
-        "четырнадцать": 14,
-        "пятнадцать": 15,
-        "шестнадцать": 16,
-        "семнадцать": 17,
-        "восемнадцать": 18,
-        "девятнадцать": 19,
-        "двадцать": 20,
-        "тридцать": 30,
-        "сорок": 40,
-        "пятьдесят": 50,
-        "шестьдесят": 60,
-        "семьдесят": 70,
-        "восемьдесят": 80,
-        "девяносто": 90,
-        "сто": 100,
-        "двести": 200,
-        "триста": 300,
-        "четыреста": 400,
-        "пятьсот": 500,
-        "шестьсот": 600,
-        "семьсот": 700,
-        "восемьсот": 800,
-        "девятьсот": 900,
-        "тысяча": 1000,
-    }
-
-    text_lower = text.lower()
-    total = 0
-
-    for word, num in numbers.items():
-        if word in text_lower:
-            total += num
-
-    return total if total > 0 else None
+    return parse_russian_number(text)
@@ -0,0 +1,282 @@
+"""Локальная сортировка фото перед платным запросом к Vision AI.
+
+Дешёвые проверки на OpenCV/NumPy: размытость, яркость, скриншоты,
+штрих-коды и этикетки с текстом. По результату фото уходит в нужный
+обработчик: отказ с советом, поиск по штрих-коду, OCR этикетки или Vision.
+"""
+import logging
+import time
+from collections import Counter
+from enum import Enum
+from typing import TypedDict, Optional
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Бюджет CPU на одно фото (секунды процессорного времени потока)
+TRIAGE_CPU_BUDGET = 0.15
+
+# До какого размера уменьшаем фото перед анализом (px по длинной стороне)
+TRIAGE_MAX_SIDE = 800
+
+# Пороги
+BLUR_THRESHOLD = 40.0  # дисперсия лапласиана: ниже — размыто
+DARK_THRESHOLD = 35.0  # средняя яркость 0-255: ниже — темно
+OVEREXPOSED_THRESHOLD = 240.0  # средняя яркость: выше — засвечено
+SCREENSHOT_FLAT_RATIO = 0.6  # доля пикселей с нулевым градиентом
+LABEL_TEXT_RATIO = 0.12  # доля площади под строками текста
+LABEL_MIN_TEXT_LINES = 12  # минимум строк текста для этикетки
+
+
+class TriageDecision(str, Enum):
+    """Куда отправить фото."""
+
+    REJECT_BLURRY = "reject_blurry"
+    REJECT_DARK = "reject_dark"
+    REJECT_OVEREXPOSED = "reject_overexposed"
+    REJECT_SCREENSHOT = "reject_screenshot"
+    BARCODE = "barcode"
+    LABEL = "label"
+    VISION = "vision"
+
+
+# Советы пользователю при отказе
+REJECT_ADVICE = {
+    TriageDecision.REJECT_BLURRY: (
+        "📷 Фото получилось размытым.\n"
+        "Подержите телефон неподвижно и сфотографируйте ещё раз."
+    ),
+    TriageDecision.REJECT_DARK: (
+        "📷 Фото слишком тёмное.\n"
+        "Включите свет или подойдите к окну и сфотографируйте ещё раз."
+    ),
+    TriageDecision.REJECT_OVEREXPOSED: (
+        "📷 Фото засвечено.\n" "Уберите прямой свет или вспышку и сфотографируйте ещё раз."
+    ),
+    TriageDecision.REJECT_SCREENSHOT: (
+        "📷 Похоже на скриншот, а не на фото еды.\n"
+        "Сфотографируйте блюдо или напишите название текстом, например: «борщ 300г»"
+    ),
+}
+
+
+class TriageResult(TypedDict):
+    """Результат локальной сортировки фото."""
+
+    decision: TriageDecision
+    advice: Optional[str]  # текст для пользователя, если фото отклонено
+    barcode: Optional[str]  # распознанный штрих-код
+    label_box: Optional[tuple[int, int, int, int]]  # x, y, w, h этикетки на исходном фото
+    blur_score: float
+    brightness: float
+    text_ratio: float
+    elapsed_ms: float
+
+
+# Распределение решений с момента запуска
+_decision_counts: Counter = Counter()
+_barcode_detector = None
+
+
+def _get_barcode_detector():
+    """Детектор штрих-кодов OpenCV (создаётся один раз)."""
+    global _barcode_detector
+    if _barcode_detector is None:
+        _barcode_detector = cv2.barcode.BarcodeDetector()
+    return _barcode_detector
+
+
+def _decode_downscaled(photo_bytes: bytes) -> tuple[Optional[np.ndarray], float]:
+    """Декодирует фото в оттенки серого и уменьшает до TRIAGE_MAX_SIDE.
+
+    Returns:
+        (изображение, коэффициент масштаба к исходному размеру)
+    """
+    buffer = np.frombuffer(photo_bytes, dtype=np.uint8)
+    gray = cv2.imdecode(buffer, cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        return None, 1.0
+
+    height, width = gray.shape
+    scale = TRIAGE_MAX_SIDE / max(height, width)
+    if scale < 1.0:
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        return gray, scale
+    return gray, 1.0
+
+
+def _flat_ratio(gray: np.ndarray) -> float:
+    """Доля пикселей без перепада яркости с соседями (типично для скриншотов)."""
+    dx = np.diff(gray, axis=1)[:-1, :] == 0
+    dy = np.diff(gray, axis=0)[:, :-1] == 0
+    return float(np.count_nonzero(dx & dy)) / dx.size
+
+
+def _find_text_lines(gray: np.ndarray) -> tuple[float, int, Optional[tuple[int, int, int, int]]]:
+    """Ищет строки текста морфологией.
+
+    Returns:
+        (доля площади под текстом, число строк, bounding box всех строк)
+    """
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+    gradient = cv2.morphologyEx(gray, cv2.MORPH_GRADIENT, kernel)
+    _, binary = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+
+    # Склеиваем буквы в строки
+    line_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (9, 1))
+    connected = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, line_kernel)
+
+    contours, _ = cv2.findContours(connected, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    text_area = 0
+    boxes = []
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        # Строка текста: вытянута по горизонтали, высота как у букв
+        if 6 <= h <= 40 and w >= 2 * h:
+            fill = cv2.countNonZero(binary[y : y + h, x : x + w]) / float(w * h)
+            if fill >= 0.35:
+                boxes.append((x, y, w, h))
+                text_area += w * h
+
+    if not boxes:
+        return 0.0, 0, None
+
+    x0 = min(b[0] for b in boxes)
+    y0 = min(b[1] for b in boxes)
+    x1 = max(b[0] + b[2] for b in boxes)
+    y1 = max(b[1] + b[3] for b in boxes)
+
+    return text_area / float(gray.size), len(boxes), (x0, y0, x1 - x0, y1 - y0)
+
+
+def _decide(photo_bytes: bytes) -> TriageResult:
+    """Последовательность проверок от дешёвых к дорогим в пределах бюджета CPU."""
+    started = time.thread_time()
+
+    def over_budget() -> bool:
+        return time.thread_time() - started > TRIAGE_CPU_BUDGET
+
+    result: TriageResult = {
+        "decision": TriageDecision.VISION,
+        "advice": None,
+        "barcode": None,
+        "label_box": None,
+        "blur_score": 0.0,
+        "brightness": 0.0,
+        "text_ratio": 0.0,
+        "elapsed_ms": 0.0,
+    }
+
+    gray, scale = _decode_downscaled(photo_bytes)
+    if gray is None:
+        # Не смогли декодировать — пусть решает Vision
+        return result
+
+    # 1. Скриншот: большие идеально ровные области и при этом резкие края.
+    # Проверяем до яркости (белый фон иначе сочтём засветкой) и до размытости
+    # (у размытого JPEG тоже много ровных областей, но нет резких краёв)
+    result["blur_score"] = float(cv2.Laplacian(gray, cv2.CV_64F).var())
+    if result["blur_score"] >= BLUR_THRESHOLD and _flat_ratio(gray) > SCREENSHOT_FLAT_RATIO:
+        result["decision"] = TriageDecision.REJECT_SCREENSHOT
+        return result
+
+    # 2. Яркость
+    result["brightness"] = float(gray.mean())
+    if result["brightness"] < DARK_THRESHOLD:
+        result["decision"] = TriageDecision.REJECT_DARK
+        return result
+    if result["brightness"] > OVEREXPOSED_THRESHOLD:
+        result["decision"] = TriageDecision.REJECT_OVEREXPOSED
+        return result
+
+    # 3. Размытость
+    if result["blur_score"] < BLUR_THRESHOLD:
+        result["decision"] = TriageDecision.REJECT_BLURRY
+        return result
+
+    # 4. Штрих-код
+    if over_budget():
+        return result
+    try:
+        decoded, _, _ = _get_barcode_detector().detectAndDecode(gray)
+        codes = [decoded] if isinstance(decoded, str) else list(decoded or [])
+        codes = [code for code in codes if code]
+        if codes:
+            result["decision"] = TriageDecision.BARCODE
+            result["barcode"] = codes[0]
+            return result
+    except cv2.error as e:
+        logger.warning(f"Barcode detection failed: {e}")
+
+    # 5. Этикетка с текстом
+    if over_budget():
+        return result
+    text_ratio, text_lines, box = _find_text_lines(gray)
+    result["text_ratio"] = text_ratio
+    if text_lines >= LABEL_MIN_TEXT_LINES and text_ratio >= LABEL_TEXT_RATIO:
+        result["decision"] = TriageDecision.LABEL
+        x, y, w, h = box
+        result["label_box"] = (
+            int(x / scale),
+            int(y / scale),
+            int(w / scale),
+            int(h / scale),
+        )
+
+    return result
+
+
+def triage_photo(photo_bytes: bytes) -> TriageResult:
+    """Локально определить, что делать с фото.
+
+    Синхронная функция: в async-обработчиках вызывать через
+    asyncio.to_thread, чтобы не блокировать event loop.
+
+    Args:
+        photo_bytes: фото в формате bytes
+
+    Returns:
+        TriageResult с решением и метриками. Если бюджет CPU исчерпан
+        раньше, чем проверки дали ответ, решение — VISION.
+    """
+    wall_started = time.perf_counter()
+
+    try:
+        result = _decide(photo_bytes)
+    except Exception as e:
+        logger.error(f"Triage error: {e}")
+        result = {
+            "decision": TriageDecision.VISION,
+            "advice": None,
+            "barcode": None,
+            "label_box": None,
+            "blur_score": 0.0,
+            "brightness": 0.0,
+            "text_ratio": 0.0,
+            "elapsed_ms": 0.0,
+        }
+
+    result["advice"] = REJECT_ADVICE.get(result["decision"])
+    result["elapsed_ms"] = round((time.perf_counter() - wall_started) * 1000, 1)
+    _decision_counts[result["decision"].value] += 1
+
+    logger.info(
+        f"Triage: {result['decision'].value} "
+        f"(blur={result['blur_score']:.0f}, brightness={result['brightness']:.0f}, "
+        f"text={result['text_ratio']:.2f}, {result['elapsed_ms']}ms)"
+    )
+    return result
+
+
+def get_triage_stats() -> dict:
+    """Распределение решений сортировки с момента запуска бота."""
+    total = sum(_decision_counts.values())
+    return {
+        "total": total,
+        "decisions": {
+            decision: {"count": count, "share": round(count / total, 3)}
+            for decision, count in _decision_counts.most_common()
+        },
+    }
@@ -0,0 +1,242 @@
+"""OCR этикеток с пищевой ценностью (Tesseract в пуле процессов)."""
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+import cv2
+import numpy as np
+import pytesseract
+from src.database import get_db
+from src.models import FoodCache, LabelScan
+from src.services.ai_cost_service import log_ai_request
+
+logger = logging.getLogger(__name__)
+
+# Процессов Tesseract (каждый занимает одно ядро)
+OCR_WORKERS = 2
+
+# Минимальная высота этикетки после масштабирования (px), мелкий шрифт Tesseract не читает
+OCR_MIN_HEIGHT = 1200
+
+# Число: 12 / 12,5 / 12.5
+_NUMBER = r"(\d{1,4}(?:[.,]\d{1,2})?)"
+
+# Ключевые слова нутриентов на русском и английском
+_NUTRIENT_PATTERNS = {
+    "protein": r"(?:белк\w*|бел\.|protein\w*)",
+    "fat": r"(?:жир\w*|fat\b)",
+    "carbs": r"(?:углевод\w*|carbohydrate\w*|carbs)",
+    "fiber": r"(?:пищев\w*\s+волок\w*|клетчатк\w*|fib(?:re|er)\w*)",
+}
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Пул процессов для Tesseract (создаётся при первом запросе)."""
+    global _pool
+    if _pool is None:
+        # spawn: не форкаем процесс с работающим event loop и потоками
+        _pool = ProcessPoolExecutor(
+            max_workers=OCR_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+
+def shutdown_ocr_pool() -> None:
+    """Остановить пул процессов OCR (при завершении бота)."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _ocr_worker(photo_bytes: bytes, label_box: Optional[tuple[int, int, int, int]]) -> str:
+    """Вырезать этикетку, бинаризовать и распознать текст (выполняется в пуле).
+
+    Args:
+        photo_bytes: фото в формате bytes
+        label_box: x, y, w, h области с текстом или None (всё фото)
+
+    Returns:
+        Распознанный текст
+    """
+    gray = cv2.imdecode(np.frombuffer(photo_bytes, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        return ""
+
+    if label_box:
+        x, y, w, h = label_box
+        # Небольшой запас, чтобы не обрезать крайние буквы
+        margin = max(10, int(0.03 * max(w, h)))
+        gray = gray[
+            max(0, y - margin) : min(gray.shape[0], y + h + margin),
+            max(0, x - margin) : min(gray.shape[1], x + w + margin),
+        ]
+
+    if gray.shape[0] < OCR_MIN_HEIGHT:
+        scale = OCR_MIN_HEIGHT / gray.shape[0]
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
+
+    # Бинаризация: адаптивный порог справляется с бликами на упаковке
+    gray = cv2.medianBlur(gray, 3)
+    binary = cv2.adaptiveThreshold(
+        gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 31, 15
+    )
+
+    try:
+        return pytesseract.image_to_string(binary, lang="rus+eng", config="--psm 6")
+    except pytesseract.TesseractNotFoundError as e:
+        # Исключение pytesseract не переживает pickle между процессами и ломает пул
+        raise RuntimeError(f"Tesseract not installed: {e}") from None
+
+
+def _to_float(value: str) -> float:
+    return float(value.replace(",", "."))
+
+
+def parse_label_text(text: str) -> Optional[dict]:
+    """Извлечь пищевую ценность на 100г из текста этикетки.
+
+    Понимает русские и английские этикетки:
+    «Белки 7,0 г, жиры 25 г, углеводы 55 г. Энергетическая ценность 470 ккал»,
+    «Energy 1970 kJ / 470 kcal, Fat 25 g, Carbohydrate 55 g, Protein 7 g».
+
+    Returns:
+        dict с calories, protein, fat, carbs, fiber или None,
+        если этикетку не удалось разобрать
+    """
+    text = text.lower().replace("\n", " ")
+    # Частые ошибки OCR в числах: «O» вместо нуля
+    text = re.sub(r"(?<=\d)[oо]|[oо](?=[.,]\d)", "0", text)
+
+    result = {"calories": None, "protein": None, "fat": None, "carbs": None, "fiber": 0.0}
+
+    for nutrient, keyword in _NUTRIENT_PATTERNS.items():
+        # Первое число после ключевого слова (первая колонка — на 100г)
+        match = re.search(keyword + r"[^\d]{0,30}?" + _NUMBER, text)
+        if match:
+            result[nutrient] = _to_float(match.group(1))
+
+    kcal = re.search(_NUMBER + r"\s*(?:ккал|kcal)", text) or re.search(
+        r"(?:ккал|kcal)[^\d]{0,10}" + _NUMBER, text
+    )
+    if kcal:
+        result["calories"] = _to_float(kcal.group(1))
+    else:
+        kj = re.search(_NUMBER + r"\s*(?:кдж|kj)", text)
+        if kj:
+            result["calories"] = round(_to_float(kj.group(1)) / 4.184)
+
+    macros = [result["protein"], result["fat"], result["carbs"]]
+    if all(value is None for value in macros) and result["calories"] is None:
+        return None
+
+    macros = [value or 0.0 for value in macros]
+    if result["calories"] is None:
+        # Калорий нет на фото — считаем по Атуотеру
+        result["calories"] = round(4 * macros[0] + 9 * macros[1] + 4 * macros[2])
+
+    # На 100г не бывает больше 100г нутриентов и больше ~900 ккал
+    if result["calories"] > 900 or sum(macros) > 100:
+        logger.warning(f"Implausible label values: {result}")
+        return None
+
+    return {
+        "calories": round(result["calories"]),
+        "protein": macros[0],
+        "fat": macros[1],
+        "carbs": macros[2],
+        "fiber": result["fiber"],
+    }
+
+
+def _find_cached_scan(image_hash: str) -> Optional[dict]:
+    """Найти ранее распознанную этикетку по хешу фото."""
+    with get_db() as db:
+        scan = db.query(LabelScan).filter(LabelScan.image_hash == image_hash).first()
+        if scan and scan.food:
+            scan.food.usage_count += 1
+            db.commit()
+            return scan.food.to_dict()
+    return None
+
+
+def _save_scan(image_hash: str, name: str, nutrients: dict, raw_text: str) -> dict:
+    """Сохранить нутриенты в FoodCache и связать с хешем фото."""
+    normalized_name = name.lower().strip()
+
+    with get_db() as db:
+        cache_entry = FoodCache(
+            name=normalized_name,
+            calories=nutrients["calories"],
+            protein=nutrients["protein"],
+            fat=nutrients["fat"],
+            carbs=nutrients["carbs"],
+            fiber=nutrients["fiber"],
+            source="label_ocr",
+        )
+        db.add(cache_entry)
+        db.flush()
+
+        db.add(LabelScan(image_hash=image_hash, food_cache_id=cache_entry.id, raw_text=raw_text))
+        db.commit()
+        logger.info(f"Saved label '{normalized_name}' to cache from OCR")
+        return cache_entry.to_dict()
+
+
+async def recognize_label(
+    photo_bytes: bytes,
+    label_box: Optional[tuple[int, int, int, int]] = None,
+    name: Optional[str] = None,
+    user_id: Optional[int] = None,
+) -> Optional[dict]:
+    """Распознать этикетку: кеш по хешу фото → Tesseract в пуле процессов.
+
+    Args:
+        photo_bytes: фото в формате bytes
+        label_box: область этикетки из сортировки фото
+        name: название продукта (подпись к фото), иначе генерируется
+        user_id: ID пользователя для логирования
+
+    Returns:
+        dict с name и нутриентами на 100г или None (тогда фото уходит в Vision)
+    """
+    image_hash = hashlib.sha256(photo_bytes).hexdigest()
+
+    cached = _find_cached_scan(image_hash)
+    if cached:
+        logger.info(f"Label cache hit {image_hash[:12]}")
+        return cached
+
+    try:
+        loop = asyncio.get_running_loop()
+        raw_text = await loop.run_in_executor(_get_pool(), _ocr_worker, photo_bytes, label_box)
+    except (RuntimeError, pytesseract.TesseractError) as e:
+        logger.error(f"Tesseract unavailable: {e}")
+        return None
+    except Exception as e:
+        logger.error(f"Label OCR error: {e}")
+        return None
+
+    nutrients = parse_label_text(raw_text)
+    if not nutrients:
+        logger.info(f"Label not parsed, OCR text: {raw_text[:200]!r}")
+        return None
+
+    product_name = name or f"этикетка {image_hash[:8]}"
+    food_data = _save_scan(image_hash, product_name, nutrients, raw_text)
+
+    if user_id:
+        await log_ai_request(
+            user_id=user_id,
+            request_type="ocr",
+            model="tesseract",
+            cost_usd=0.0,
+            food_name=product_name,
+        )
+
+    return food_data
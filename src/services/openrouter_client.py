@@ -0,0 +1,278 @@
+"""Общий асинхронный клиент OpenRouter (HTTP/2, повторы, замер времени ответа)."""
+import asyncio
+import json
+import logging
+import random
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import TypedDict, Optional
+import httpx
+from src.config import config
+from src.services.ai_cost_service import estimate_cost
+from src.services.token_logger import log_token_usage
+
+logger = logging.getLogger(__name__)
+
+OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+
+# Таймаут ответа по моделям (секунды): vision-модели думают дольше
+MODEL_TIMEOUTS = {
+    "openai/gpt-4o": 45.0,
+    "openai/gpt-4o-mini": 30.0,
+    "google/gemma-2-9b-it": 10.0,
+}
+DEFAULT_TIMEOUT = 30.0
+CONNECT_TIMEOUT = 5.0
+
+# Повторы при 429/5xx и сетевых ошибках
+MAX_ATTEMPTS = 3
+RETRY_BASE_DELAY = 0.5  # секунды, удваивается с каждой попыткой
+RETRY_MAX_DELAY = 8.0
+RETRY_AFTER_LIMIT = 30.0  # дольше ждать не готовы — отдаём ошибку
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class OpenRouterError(Exception):
+    """Запрос к OpenRouter не удался (после всех повторов)."""
+
+
+class ChatResult(TypedDict):
+    """Ответ модели с метриками вызова."""
+
+    content: str
+    model: str
+    usage: dict
+    tokens_input: int
+    tokens_output: int
+    cost_usd: float
+    latency_ms: float
+    ttfb_ms: float
+    attempts: int
+
+
+def extract_json_content(content: str):
+    """Распарсить JSON из ответа модели, убрав markdown code blocks."""
+    if "```json" in content:
+        content = content.split("```json")[1].split("```")[0]
+    elif "```" in content:
+        content = content.split("```")[1].split("```")[0]
+    return json.loads(content.strip())
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After: число секунд или HTTP-дата."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Экспоненциальная задержка с full jitter."""
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2**attempt))
+
+
+class OpenRouterClient:
+    """Клиент с постоянным пулом HTTP/2 соединений.
+
+    Один экземпляр на процесс: соединение и TLS-сессия переиспользуются
+    между запросами всех сервисов.
+    """
+
+    def __init__(self, api_key: str, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self._client = httpx.AsyncClient(
+            http2=True,
+            transport=transport,
+            headers={
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json",
+                "HTTP-Referer": "https://diet-bot.local",
+                "X-Title": "Diet Bot",
+            },
+            limits=httpx.Limits(
+                max_connections=20, max_keepalive_connections=10, keepalive_expiry=120
+            ),
+        )
+        # Метрики по моделям с момента запуска
+        self.stats: dict[str, dict] = {}
+
+    def _record(self, model: str, **values) -> None:
+        stats = self.stats.setdefault(
+            model,
+            {"calls": 0, "errors": 0, "retries": 0, "latency_ms": 0.0, "ttfb_ms": 0.0},
+        )
+        for key, value in values.items():
+            stats[key] += value
+
+    async def chat(
+        self,
+        model: str,
+        messages: list[dict],
+        max_tokens: int,
+        temperature: float,
+        operation: str,
+        user_id: Optional[int] = None,
+    ) -> ChatResult:
+        """Запрос к chat/completions с повторами.
+
+        Args:
+            model: модель OpenRouter
+            messages: сообщения чата
+            max_tokens: лимит токенов ответа
+            temperature: температура
+            operation: тип операции для лога токенов (photo_analysis, edit_parse, ...)
+            user_id: ID пользователя для лога токенов
+
+        Returns:
+            ChatResult с текстом ответа, usage, стоимостью и временем ответа
+
+        Raises:
+            OpenRouterError: если ответа не получили за MAX_ATTEMPTS попыток
+        """
+        payload = {
+            "model": model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            # Точная стоимость в usage.cost
+            "usage": {"include": True},
+        }
+        timeout = httpx.Timeout(MODEL_TIMEOUTS.get(model, DEFAULT_TIMEOUT), connect=CONNECT_TIMEOUT)
+
+        last_error = None
+        for attempt in range(MAX_ATTEMPTS):
+            if attempt:
+                self._record(model, retries=1)
+
+            started = time.perf_counter()
+            try:
+                async with self._client.stream(
+                    "POST", OPENROUTER_URL, json=payload, timeout=timeout
+                ) as response:
+                    ttfb = time.perf_counter() - started
+                    body = await response.aread()
+                latency = time.perf_counter() - started
+            except httpx.TransportError as e:
+                last_error = f"{type(e).__name__}: {e}"
+                logger.warning(f"OpenRouter {model} attempt {attempt + 1}: {last_error}")
+                if attempt + 1 < MAX_ATTEMPTS:
+                    await asyncio.sleep(_backoff_delay(attempt))
+                continue
+
+            if response.status_code in RETRY_STATUSES:
+                last_error = f"HTTP {response.status_code}"
+                delay = _backoff_delay(attempt)
+                retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+                if retry_after is not None:
+                    if retry_after > RETRY_AFTER_LIMIT:
+                        logger.warning(f"OpenRouter {model}: Retry-After {retry_after}s, giving up")
+                        break
+                    delay = max(delay, retry_after)
+                logger.warning(
+                    f"OpenRouter {model} attempt {attempt + 1}: {last_error}, retry in {delay:.1f}s"
+                )
+                if attempt + 1 < MAX_ATTEMPTS:
+                    await asyncio.sleep(delay)
+                continue
+
+            if response.status_code >= 400:
+                self._record(model, errors=1)
+                raise OpenRouterError(f"HTTP {response.status_code}: {body[:200]!r}")
+
+            data = json.loads(body)
+            usage = data.get("usage") or {}
+            tokens_input = usage.get("prompt_tokens", 0)
+            tokens_output = usage.get("completion_tokens", 0)
+            cost = usage.get("cost") or data.get("cost") or estimate_cost(
+                model, tokens_input, tokens_output
+            )
+
+            result: ChatResult = {
+                "content": data["choices"][0]["message"]["content"],
+                "model": model,
+                "usage": usage,
+                "tokens_input": tokens_input,
+                "tokens_output": tokens_output,
+                "cost_usd": cost,
+                "latency_ms": round(latency * 1000, 1),
+                "ttfb_ms": round(ttfb * 1000, 1),
+                "attempts": attempt + 1,
+            }
+
+            self._record(
+                model, calls=1, latency_ms=result["latency_ms"], ttfb_ms=result["ttfb_ms"]
+            )
+            log_token_usage(
+                operation=operation,
+                model=model,
+                input_tokens=tokens_input,
+                output_tokens=tokens_output,
+                user_id=user_id,
+                cost_usd=cost,
+                latency_ms=result["latency_ms"],
+                ttfb_ms=result["ttfb_ms"],
+            )
+            logger.info(
+                f"OpenRouter {model}: {result['latency_ms']}ms "
+                f"(TTFB {result['ttfb_ms']}ms, attempts {result['attempts']}), ${cost:.5f}"
+            )
+            return result
+
+        self._record(model, errors=1)
+        raise OpenRouterError(f"{model} failed after {MAX_ATTEMPTS} attempts: {last_error}")
+
+    def get_stats(self) -> dict:
+        """Средние задержки и число ошибок по моделям."""
+        return {
+            model: {
+                "calls": stats["calls"],
+                "errors": stats["errors"],
+                "retries": stats["retries"],
+                "avg_latency_ms": round(stats["latency_ms"] / stats["calls"], 1)
+                if stats["calls"]
+                else 0.0,
+                "avg_ttfb_ms": round(stats["ttfb_ms"] / stats["calls"], 1)
+                if stats["calls"]
+                else 0.0,
+            }
+            for model, stats in self.stats.items()
+        }
+
+    async def aclose(self) -> None:
+        """Закрыть пул соединений."""
+        await self._client.aclose()
+
+
+# Глобальный экземпляр
+_openrouter_client: Optional[OpenRouterClient] = None
+
+
+def get_openrouter_client() -> OpenRouterClient:
+    """Получить или создать клиент OpenRouter."""
+    global _openrouter_client
+    if _openrouter_client is None:
+        _openrouter_client = OpenRouterClient(config.OPENROUTER_API_KEY)
+    return _openrouter_client
+
+
+def get_openrouter_stats() -> dict:
+    """Метрики вызовов по моделям (пусто, если запросов ещё не было)."""
+    if _openrouter_client is None:
+        return {}
+    return _openrouter_client.get_stats()
+
+
+async def close_openrouter_client() -> None:
+    """Закрыть клиент OpenRouter (при остановке бота)."""
+    global _openrouter_client
+    if _openrouter_client is not None:
+        await _openrouter_client.aclose()
+        _openrouter_client = None
@@ -1,14 +1,14 @@
 """Сервис для подсчета статистики."""
 from datetime import datetime, timedelta
 from typing import Optional
-from sqlalchemy import func
-from src.database import get_db
+from sqlalchemy import func, select
+from src.database import get_async_db
 from src.models import FoodLog, User
 
 
-def get_today_stats(user_id: int) -> dict:
+async def get_today_stats(user_id: int) -> dict:
     """Получить статистику за сегодня (по Москве UTC+3)."""
-    with get_db() as db:
+    async with get_async_db() as db:
         # Московское время UTC+3
         from datetime import timezone
 
@@ -20,15 +20,14 @@ def get_today_stats(user_id: int) -> dict:
         today_start_utc = datetime.combine(today_msk, datetime.min.time()) - timedelta(hours=3)
         tomorrow_start_utc = today_start_utc + timedelta(days=1)
 
-        logs = (
-            db.query(FoodLog)
-            .filter(
+        result = await db.execute(
+            select(FoodLog).where(
                 FoodLog.user_id == user_id,
                 FoodLog.created_at >= today_start_utc,
                 FoodLog.created_at < tomorrow_start_utc,
             )
-            .all()
         )
+        logs = result.scalars().all()
 
         total_cal = sum(log.calories for log in logs)
         total_protein = sum(log.protein for log in logs)
@@ -50,9 +49,9 @@ def get_today_stats(user_id: int) -> dict:
         }
 
 
-def get_yesterday_stats(user_id: int) -> dict:
+async def get_yesterday_stats(user_id: int) -> dict:
     """Получить статистику за вчера (по Москве UTC+3)."""
-    with get_db() as db:
+    async with get_async_db() as db:
         from datetime import timezone
 
         msk_offset = timezone(timedelta(hours=3))
@@ -64,15 +63,14 @@ def get_yesterday_stats(user_id: int) -> dict:
         )
         yesterday_end_utc = yesterday_start_utc + timedelta(days=1)
 
-        logs = (
-            db.query(FoodLog)
-            .filter(
+        result = await db.execute(
+            select(FoodLog).where(
                 FoodLog.user_id == user_id,
                 FoodLog.created_at >= yesterday_start_utc,
                 FoodLog.created_at < yesterday_end_utc,
             )
-            .all()
         )
+        logs = result.scalars().all()
 
         total_cal = sum(log.calories for log in logs)
         total_protein = sum(log.protein for log in logs)
@@ -92,9 +90,9 @@ def get_yesterday_stats(user_id: int) -> dict:
         }
 
 
-def get_week_stats(user_id: int) -> dict:
+async def get_week_stats(user_id: int) -> dict:
     """Получить статистику за неделю (по Москве UTC+3)."""
-    with get_db() as db:
+    async with get_async_db() as db:
         from datetime import timezone
 
         msk_offset = timezone(timedelta(hours=3))
@@ -103,14 +101,13 @@ def get_week_stats(user_id: int) -> dict:
 
         week_start_utc = datetime.combine(week_ago_msk, datetime.min.time()) - timedelta(hours=3)
 
-        logs = (
-            db.query(FoodLog)
-            .filter(
+        result = await db.execute(
+            select(FoodLog).where(
                 FoodLog.user_id == user_id,
                 FoodLog.created_at >= week_start_utc,
             )
-            .all()
         )
+        logs = result.scalars().all()
 
         # Группируем по дням
         daily_cal = {}
@@ -145,9 +142,9 @@ def get_week_stats(user_id: int) -> dict:
         }
 
 
-def get_month_stats(user_id: int) -> dict:
+async def get_month_stats(user_id: int) -> dict:
     """Получить статистику за месяц (по Москве UTC+3)."""
-    with get_db() as db:
+    async with get_async_db() as db:
         from datetime import timezone
 
         msk_offset = timezone(timedelta(hours=3))
@@ -156,14 +153,13 @@ def get_month_stats(user_id: int) -> dict:
 
         month_start_utc = datetime.combine(month_ago_msk, datetime.min.time()) - timedelta(hours=3)
 
-        logs = (
-            db.query(FoodLog)
-            .filter(
+        result = await db.execute(
+            select(FoodLog).where(
                 FoodLog.user_id == user_id,
                 FoodLog.created_at >= month_start_utc,
             )
-            .all()
         )
+        logs = result.scalars().all()
 
         # Группируем по дням
         daily_cal = {}
@@ -197,21 +193,20 @@ def get_month_stats(user_id: int) -> dict:
         }
 
 
-def get_period_stats(user_id: int, days: int) -> dict:
+async def get_period_stats(user_id: int, days: int) -> dict:
     """Получить статистику за период.
 
     Args:
         user_id: ID пользователя
         days: Количество дней (7, 30)
     """
-    with get_db() as db:
+    async with get_async_db() as db:
         start_date = datetime.now() - timedelta(days=days)
 
-        logs = (
-            db.query(FoodLog)
-            .filter(FoodLog.user_id == user_id, FoodLog.created_at >= start_date)
-            .all()
+        result = await db.execute(
+            select(FoodLog).where(FoodLog.user_id == user_id, FoodLog.created_at >= start_date)
         )
+        logs = result.scalars().all()
 
         if not logs:
             return {"avg_calories": 0, "total_days": 0, "message": "Нет данных за период"}
@@ -19,7 +19,14 @@ def ensure_log_dir():
 
 
 def log_token_usage(
-    operation: str, model: str, input_tokens: int, output_tokens: int, user_id: int = None
+    operation: str,
+    model: str,
+    input_tokens: int,
+    output_tokens: int,
+    user_id: int = None,
+    cost_usd: float = None,
+    latency_ms: float = None,
+    ttfb_ms: float = None,
 ) -> dict:
     """Логирует использование токенов.
 
@@ -29,6 +36,9 @@ def log_token_usage(
         input_tokens: токены на вход
         output_tokens: токены на выход
         user_id: ID пользователя (опционально)
+        cost_usd: точная стоимость из ответа API (иначе считаем по PRICING)
+        latency_ms: полное время ответа (опционально)
+        ttfb_ms: время до первого байта ответа (опционально)
 
     Returns:
         dict с информацией о затратах
@@ -36,10 +46,13 @@ def log_token_usage(
     ensure_log_dir()
 
     # Расчёт стоимости
-    prices = PRICING.get(model, {"input": 1.0, "output": 3.0})
-    input_cost = (input_tokens / 1_000_000) * prices["input"]
-    output_cost = (output_tokens / 1_000_000) * prices["output"]
-    total_cost = input_cost + output_cost
+    if cost_usd is not None:
+        total_cost = cost_usd
+    else:
+        prices = PRICING.get(model, {"input": 1.0, "output": 3.0})
+        input_cost = (input_tokens / 1_000_000) * prices["input"]
+        output_cost = (output_tokens / 1_000_000) * prices["output"]
+        total_cost = input_cost + output_cost
 
     entry = {
         "timestamp": datetime.now().isoformat(),
@@ -51,6 +64,10 @@ def log_token_usage(
         "cost_usd": round(total_cost, 6),
         "user_id": user_id,
     }
+    if latency_ms is not None:
+        entry["latency_ms"] = latency_ms
+    if ttfb_ms is not None:
+        entry["ttfb_ms"] = ttfb_ms
 
     # Дописываем в файл
     with open(TOKEN_LOG_FILE, "a", encoding="utf-8") as f:
@@ -1,12 +1,13 @@
 """Сервис для работы с пользователями."""
 from typing import Optional
 from telegram import User as TelegramUser
+from sqlalchemy import select
 from sqlalchemy.orm import joinedload
-from src.database import get_db
+from src.database import get_async_db
 from src.models import User, Profile
 
 
-def get_or_create_user(telegram_user: TelegramUser) -> User:
+async def get_or_create_user(telegram_user: TelegramUser) -> User:
     """Получить или создать пользователя.
 
     Args:
@@ -15,32 +16,31 @@ def get_or_create_user(telegram_user: TelegramUser) -> User:
     Returns:
         Объект User из БД
     """
-    with get_db() as db:
+    async with get_async_db() as db:
         # Ищем пользователя с загрузкой профиля
-        user = (
-            db.query(User)
+        result = await db.execute(
+            select(User)
             .options(joinedload(User.profile))
-            .filter(User.telegram_id == telegram_user.id)
-            .first()
+            .where(User.telegram_id == telegram_user.id)
         )
+        user = result.scalars().first()
 
         if not user:
-            # Создаем нового
+            # Создаем нового (профиля при создании нет)
             user = User(
                 telegram_id=telegram_user.id,
                 username=telegram_user.username,
                 first_name=telegram_user.first_name,
                 last_name=telegram_user.last_name,
+                profile=None,
             )
             db.add(user)
-            db.commit()
-            db.refresh(user)
-            # При создании профиля нет, так что объекты простые
+            await db.flush()
 
         return user
 
 
-def get_user_by_telegram_id(telegram_id: int) -> Optional[User]:
+async def get_user_by_telegram_id(telegram_id: int) -> Optional[User]:
     """Получить пользователя по Telegram ID.
 
     Args:
@@ -49,13 +49,11 @@ def get_user_by_telegram_id(telegram_id: int) -> Optional[User]:
     Returns:
         Объект User или None
     """
-    with get_db() as db:
-        return (
-            db.query(User)
-            .options(joinedload(User.profile))
-            .filter(User.telegram_id == telegram_id)
-            .first()
+    async with get_async_db() as db:
+        result = await db.execute(
+            select(User).options(joinedload(User.profile)).where(User.telegram_id == telegram_id)
         )
+        return result.scalars().first()
 
 
 def has_profile(user: User) -> bool:
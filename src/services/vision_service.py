@@ -3,8 +3,8 @@ import base64
 import json
 import logging
 from typing import TypedDict, Optional
-import requests
-from src.config import config
+from src.services.ai_cost_service import log_ai_request
+from src.services.openrouter_client import get_openrouter_client, extract_json_content
 
 logger = logging.getLogger(__name__)
 
@@ -24,13 +24,16 @@ class VisionResult(TypedDict):
     error: Optional[str]
 
 
-def analyze_food_photo_simple(photo_bytes: bytes) -> VisionResult:
+async def analyze_food_photo_simple(
+    photo_bytes: bytes, user_id: Optional[int] = None
+) -> VisionResult:
     """Анализ фото: возвращает только названия продуктов и их вес.
 
     НЕ считает калории — это делает FatSecret сервис.
 
     Args:
         photo_bytes: фото в формате bytes
+        user_id: ID пользователя для логирования стоимости
 
     Returns:
         VisionResult со списком {"food": "название", "weight": граммы}
@@ -81,47 +84,39 @@ def analyze_food_photo_simple(photo_bytes: bytes) -> VisionResult:
 Если не уверен — дай ОБЩЕЕ название (не выдумывай).
 Если совсем непонятно — пустой массив []."""
 
-        response = requests.post(
-            "https://openrouter.ai/api/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {config.OPENROUTER_API_KEY}",
-                "Content-Type": "application/json",
-                "HTTP-Referer": "https://diet-bot.local",
-                "X-Title": "Diet Bot",
-            },
-            json={
-                "model": "openai/gpt-4o-mini",
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "image_url",
-                                "image_url": {"url": f"data:image/jpeg;base64,{image_base64}"},
-                            }
-                        ],
-                    },
-                ],
-                "max_tokens": 500,
-                "temperature": 0.3,
-            },
-            timeout=30,
+        model = "openai/gpt-4o-mini"
+        response = await get_openrouter_client().chat(
+            model=model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {
+                    "role": "user",
+                    "content": [
+                        {
+                            "type": "image_url",
+                            "image_url": {"url": f"data:image/jpeg;base64,{image_base64}"},
+                        }
+                    ],
+                },
+            ],
+            max_tokens=500,
+            temperature=0.3,
+            operation="photo_analysis",
+            user_id=user_id,
         )
 
-        response.raise_for_status()
-        data = response.json()
-
-        # Парсим ответ
-        ai_content = data["choices"][0]["message"]["content"]
-
-        # Убираем markdown code blocks
-        if "```json" in ai_content:
-            ai_content = ai_content.split("```json")[1].split("```")[0]
-        elif "```" in ai_content:
-            ai_content = ai_content.split("```")[1].split("```")[0]
-
-        foods = json.loads(ai_content.strip())
+        # Логируем стоимость запроса
+        if user_id:
+            await log_ai_request(
+                user_id=user_id,
+                request_type="vision",
+                model=model,
+                cost_usd=response["cost_usd"],
+                tokens_input=response["tokens_input"],
+                tokens_output=response["tokens_output"],
+            )
+
+        foods = extract_json_content(response["content"])
 
         # Валидация формата
         if not isinstance(foods, list):
@@ -0,0 +1,31 @@
+"""Тесты асинхронного доступа к БД."""
+import asyncio
+from types import SimpleNamespace
+from src.database import init_db, _async_url
+from src.services.user_service import get_or_create_user, get_user_by_telegram_id, has_profile
+
+
+def test_async_url_driver_mapping():
+    """Синхронный URL из конфига получает асинхронный драйвер."""
+    assert _async_url("sqlite:///diet_bot.db") == "sqlite+aiosqlite:///diet_bot.db"
+    assert _async_url("postgresql://u:p@db/diet") == "postgresql+asyncpg://u:p@db/diet"
+    assert _async_url("postgres://u:p@db/diet") == "postgresql+asyncpg://u:p@db/diet"
+
+
+def test_get_or_create_user_is_async():
+    """Пользователь создаётся один раз, профиль доступен без ленивой загрузки."""
+    init_db()
+    telegram_user = SimpleNamespace(
+        id=987654321, username="async_test", first_name="Тест", last_name=None
+    )
+
+    async def run():
+        created = await get_or_create_user(telegram_user)
+        again = await get_or_create_user(telegram_user)
+        found = await get_user_by_telegram_id(telegram_user.id)
+        return created, again, found
+
+    created, again, found = asyncio.run(run())
+    assert created.id == again.id == found.id
+    assert not has_profile(created)
+    assert not has_profile(found)
@@ -0,0 +1,77 @@
+"""Тесты кеша ответов Gemma на команды редактирования."""
+import asyncio
+import pytest
+from src.database import init_db
+from src.services import edit_cache, gemma_service
+
+
+class _FakeClient:
+    """Отвечает как Gemma и считает вызовы."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def chat(self, **kwargs):
+        self.calls += 1
+        return {
+            "content": '{"action": "change_grams", "value": 200, "target": "второе"}',
+            "cost_usd": 0.0002,
+            "tokens_input": 300,
+            "tokens_output": 30,
+        }
+
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    init_db()
+    edit_cache.clear_edit_cache()
+    client = _FakeClient()
+    monkeypatch.setattr(gemma_service, "get_openrouter_client", lambda: client)
+    yield client
+    edit_cache.clear_edit_cache()
+
+
+def test_normalized_key_ignores_case_and_punctuation():
+    """Регистр и пунктуация не меняют ключ, порядок продуктов — меняет."""
+    foods = ["Гречка", "Курица"]
+    key = edit_cache.make_cache_key("Второе — двести грамм!", foods)
+    assert key == edit_cache.make_cache_key("второе двести  грамм", foods)
+    assert key != edit_cache.make_cache_key("второе двести грамм", foods[::-1])
+
+
+def test_repeated_phrase_hits_cache_and_survives_restart(fake_client):
+    """Повтор фразы не идёт в Gemma, в том числе после перезапуска."""
+    foods = ["Гречка", "Курица"]
+    text = "второе на двести грамм, пожалуйста"
+
+    first = asyncio.run(gemma_service.parse_edit_command(text, foods))
+    second = asyncio.run(gemma_service.parse_edit_command(text.upper(), foods))
+    assert first == second
+    assert fake_client.calls == 1
+    assert edit_cache.get_edit_cache_stats()["hits"] == 1
+
+    # «Перезапуск»: память пуста, запись поднимается из БД
+    edit_cache.clear_edit_cache()
+    third = asyncio.run(gemma_service.parse_edit_command(text, foods))
+    assert third == first
+    assert fake_client.calls == 1
+
+    # Другой список продуктов — другой ответ
+    asyncio.run(gemma_service.parse_edit_command(text, ["Курица", "Гречка"]))
+    assert fake_client.calls == 2
+
+
+def test_lru_eviction(fake_client, monkeypatch):
+    """Сверх лимита вытесняется давно не использованная запись."""
+    monkeypatch.setattr(edit_cache, "EDIT_CACHE_SIZE", 2)
+    for phrase in ("сто грамм", "двести грамм"):
+        asyncio.run(gemma_service.parse_edit_command(f"lru {phrase}"))
+    # Освежаем первую, третья вытесняет вторую
+    asyncio.run(gemma_service.parse_edit_command("lru сто грамм"))
+    asyncio.run(gemma_service.parse_edit_command("lru триста грамм"))
+    assert fake_client.calls == 3
+
+    asyncio.run(gemma_service.parse_edit_command("lru сто грамм"))
+    assert fake_client.calls == 3
+    asyncio.run(gemma_service.parse_edit_command("lru двести грамм"))
+    assert fake_client.calls == 4
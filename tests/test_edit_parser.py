@@ -0,0 +1,46 @@
+"""Тесты локального разбора команд редактирования."""
+from src.services.edit_parser import FAST_PATH_MIN_CONFIDENCE, parse_edit_fast, parse_russian_number
+from src.services.gemma_service import number_to_int
+
+
+def test_parse_russian_numbers():
+    """Числа прописью собираются по разрядам, а не суммой подстрок."""
+    assert parse_russian_number("сто пятьдесят") == 150
+    assert parse_russian_number("семнадцать") == 17
+    assert parse_russian_number("тысяча двести") == 1200
+    assert parse_russian_number("полторы тысячи") == 1500
+    assert parse_russian_number("двести сорок пять грамм") == 245
+    assert parse_russian_number("просто текст") is None
+    assert number_to_int("семьдесят") == 70
+
+
+def test_grams_and_calories_are_fast():
+    """Число с единицей разбирается без Gemma."""
+    result = parse_edit_fast("250 грамм")
+    assert result["action"] == "change_grams"
+    assert result["value"] == 250
+    assert result["confidence"] >= FAST_PATH_MIN_CONFIDENCE
+
+    result = parse_edit_fast("полкило? нет, ноль пять кг")
+    assert result["confidence"] < FAST_PATH_MIN_CONFIDENCE
+
+    result = parse_edit_fast("сто пятьдесят ккал у гречки", ["Гречка", "Курица"])
+    assert result["action"] == "change_calories"
+    assert result["value"] == 150
+    assert result["target"] == "Гречка"
+
+
+def test_product_change():
+    """«X вместо Y» — замена продукта, нормализация падежа."""
+    result = parse_edit_fast("хочу рис вместо гречки", ["Гречка", "Курица"])
+    assert result["action"] == "change_product"
+    assert result["target"] == "Гречка"
+    assert result["new_product"] == "рис"
+    assert result["confidence"] >= FAST_PATH_MIN_CONFIDENCE
+
+
+def test_ambiguous_commands_fall_back():
+    """Голое число и непонятные фразы уходят в Gemma."""
+    assert parse_edit_fast("250")["confidence"] < FAST_PATH_MIN_CONFIDENCE
+    assert parse_edit_fast("сделай поменьше")["confidence"] < FAST_PATH_MIN_CONFIDENCE
+    assert parse_edit_fast("100 или 200 грамм")["confidence"] < FAST_PATH_MIN_CONFIDENCE
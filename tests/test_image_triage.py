@@ -0,0 +1,72 @@
+"""Тесты локальной сортировки фото."""
+import cv2
+import numpy as np
+from src.services.image_triage import triage_photo, get_triage_stats, TriageDecision
+
+
+def _food_like_photo() -> np.ndarray:
+    """Синтетическое «фото»: цветные пятна с шумом камеры."""
+    rng = np.random.default_rng(0)
+    img = np.full((960, 1280, 3), 120, np.uint8)
+    for _ in range(40):
+        center = (int(rng.integers(0, 1280)), int(rng.integers(0, 960)))
+        color = tuple(int(c) for c in rng.integers(0, 255, 3))
+        cv2.circle(img, center, int(rng.integers(20, 150)), color, -1)
+    return cv2.add(img, rng.integers(0, 30, img.shape, dtype=np.uint8))
+
+
+def _jpeg(img: np.ndarray) -> bytes:
+    return cv2.imencode(".jpg", img)[1].tobytes()
+
+
+def test_triage_routes_normal_photo_to_vision():
+    """Обычное фото идёт в Vision."""
+    result = triage_photo(_jpeg(_food_like_photo()))
+    assert result["decision"] == TriageDecision.VISION
+    assert result["advice"] is None
+
+
+def test_triage_rejects_bad_photos():
+    """Тёмные, размытые фото и скриншоты отклоняются с советом."""
+    photo = _food_like_photo()
+
+    dark = triage_photo(_jpeg((photo * 0.15).astype(np.uint8)))
+    assert dark["decision"] == TriageDecision.REJECT_DARK
+    assert dark["advice"]
+
+    blurry = triage_photo(_jpeg(cv2.GaussianBlur(photo, (51, 51), 20)))
+    assert blurry["decision"] == TriageDecision.REJECT_BLURRY
+
+    screenshot = np.full((1920, 1080, 3), 250, np.uint8)
+    for i in range(30):
+        cv2.putText(
+            screenshot, f"Line {i} kcal", (20, 60 + i * 60), cv2.FONT_HERSHEY_SIMPLEX, 1.2, 0, 2
+        )
+    result = triage_photo(cv2.imencode(".png", screenshot)[1].tobytes())
+    assert result["decision"] == TriageDecision.REJECT_SCREENSHOT
+
+
+def test_triage_detects_label_and_counts_decisions():
+    """Фото с плотным текстом определяется как этикетка, решения считаются."""
+    rng = np.random.default_rng(1)
+    label = cv2.add(
+        np.full((1280, 960, 3), 200, np.uint8), rng.integers(0, 25, (1280, 960, 3), dtype=np.uint8)
+    )
+    for i in range(20):
+        cv2.putText(
+            label, f"Belki {i}.5 g zhiry 3.{i} g", (40, 80 + i * 55),
+            cv2.FONT_HERSHEY_SIMPLEX, 1.1, (20, 20, 20), 2,
+        )
+
+    before = get_triage_stats()["decisions"].get("label", {}).get("count", 0)
+    result = triage_photo(_jpeg(label))
+
+    assert result["decision"] == TriageDecision.LABEL
+    assert result["label_box"] is not None
+    assert get_triage_stats()["decisions"]["label"]["count"] == before + 1
+
+
+def test_triage_handles_garbage_bytes():
+    """Битые данные не ломают сортировку — решение за Vision."""
+    result = triage_photo(b"not an image")
+    assert result["decision"] == TriageDecision.VISION
@@ -0,0 +1,37 @@
+"""Тесты разбора текста этикеток."""
+from src.services.label_ocr_service import parse_label_text
+
+
+def test_parse_russian_label():
+    """Русская этикетка: БЖУ, клетчатка и ккал рядом с кДж."""
+    result = parse_label_text(
+        "Пищевая ценность на 100 г: белки 7,0 г, жиры 25,0 г,\n"
+        "углеводы 55,0 г, пищевые волокна 2,1 г.\n"
+        "Энергетическая ценность 1970 кДж / 470 ккал"
+    )
+    assert result == {"calories": 470, "protein": 7.0, "fat": 25.0, "carbs": 55.0, "fiber": 2.1}
+
+
+def test_parse_english_label():
+    """Английская этикетка: «of which saturates» не подменяет жиры."""
+    result = parse_label_text(
+        "NUTRITION per 100g Energy 1970 kJ / 470 kcal Fat 25 g "
+        "of which saturates 10 g Carbohydrate 55 g Fibre 2 g Protein 7 g"
+    )
+    assert result["calories"] == 470
+    assert result["fat"] == 25.0
+    assert result["fiber"] == 2.0
+
+
+def test_parse_label_without_energy():
+    """Без калорий на этикетке — считаем по БЖУ, чиним «O» вместо нуля."""
+    result = parse_label_text("Белки 2O г жиры 1O,5 г углеводы 3,O г")
+    assert result["protein"] == 20.0
+    assert result["fat"] == 10.5
+    assert result["calories"] == round(4 * 20 + 9 * 10.5 + 4 * 3)
+
+
+def test_parse_label_rejects_noise():
+    """Текст без пищевой ценности и неправдоподобные значения отбрасываются."""
+    assert parse_label_text("Состав: мука, сахар, соль") is None
+    assert parse_label_text("Белки 70 г жиры 80 г углеводы 90 г") is None
@@ -0,0 +1,54 @@
+"""Тесты сессии БД на апдейт."""
+import asyncio
+from sqlalchemy import func, select
+from src.database import get_async_db, init_db, mark_update_failed
+from src.middleware import DbUpdateProcessor, get_update_stats
+from src.models import FoodCache
+
+
+async def _add_food(name: str, fail: bool = False) -> None:
+    """Имитация обработчика: сервис и обработчик пишут в одну сессию."""
+    async with get_async_db() as db:
+        db.add(FoodCache(name=name, calories=100))
+        await db.flush()
+    async with get_async_db() as db:
+        await db.execute(select(FoodCache).where(FoodCache.name == name))
+    if fail:
+        # Так делает error_handler после исключения в обработчике
+        mark_update_failed()
+
+
+async def _count(name: str) -> int:
+    async with get_async_db() as db:
+        result = await db.execute(select(func.count(FoodCache.id)).where(FoodCache.name == name))
+        return result.scalar()
+
+
+def test_update_commits_once_and_counts_queries():
+    """Успешный апдейт коммитится, запросы считаются, тяжёлые — отмечаются."""
+    init_db()
+    processor = DbUpdateProcessor(max_concurrent_updates=1, slow_update_queries=1)
+    before = get_update_stats()
+
+    async def run():
+        await processor.do_process_update(object(), _add_food("middleware ok"))
+        return await _count("middleware ok")
+
+    assert asyncio.run(run()) == 1
+    after = get_update_stats()
+    assert after["updates"] == before["updates"] + 1
+    assert after["queries"] - before["queries"] >= 2
+    assert after["slow"] == before["slow"] + 1
+
+
+def test_failed_update_rolls_back():
+    """После ошибки в обработчике изменения апдейта откатываются."""
+    init_db()
+    processor = DbUpdateProcessor(max_concurrent_updates=1, slow_update_queries=100)
+
+    async def run():
+        await processor.do_process_update(object(), _add_food("middleware fail", fail=True))
+        return await _count("middleware fail")
+
+    assert asyncio.run(run()) == 0
+    assert get_update_stats()["rollbacks"] >= 1
@@ -0,0 +1,63 @@
+"""Тесты миграций и индексов для выборок статистики."""
+import asyncio
+from datetime import datetime
+from sqlalchemy import create_engine, event, inspect, text
+from src.database import async_engine, engine, init_db
+from src.migrations import get_schema_version, run_migrations
+from src.services.ai_cost_service import get_user_ai_costs
+from src.services.stats_service import get_today_stats, get_week_stats
+
+
+def test_migrations_add_indexes_to_existing_database(tmp_path):
+    """Старая база без индексов получает их при запуске, повторный запуск ничего не делает."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        for table in ("food_logs", "weight_logs", "ai_usage_logs"):
+            conn.execute(
+                text(
+                    f"CREATE TABLE {table} "
+                    f"(id INTEGER PRIMARY KEY, user_id INTEGER, created_at DATETIME)"
+                )
+            )
+
+    assert run_migrations(engine) == [1]
+    assert run_migrations(engine) == []
+
+    indexes = {index["name"] for index in inspect(engine).get_indexes("food_logs")}
+    assert "ix_food_logs_user_id_created_at" in indexes
+    with engine.connect() as conn:
+        assert get_schema_version(conn) == 1
+
+
+def _capture_queries(coroutine) -> list[tuple[str, tuple]]:
+    """Выполнить сервис и вернуть его SQL-запросы с параметрами."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        asyncio.run(coroutine)
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", capture)
+    return statements
+
+
+def test_stats_queries_use_composite_index():
+    """План реальных запросов статистики идёт по (user_id, created_at), а не по всей таблице."""
+    init_db()
+
+    for service, table in (
+        (get_today_stats(1), "food_logs"),
+        (get_week_stats(1), "food_logs"),
+        (get_user_ai_costs(1), "ai_usage_logs"),
+    ):
+        queries = [item for item in _capture_queries(service) if table in item[0]]
+        assert queries
+
+        with engine.connect() as conn:
+            for statement, parameters in queries:
+                plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+                details = " ".join(row[-1] for row in plan)
+                assert f"ix_{table}_user_id_created_at" in details, details
@@ -0,0 +1,105 @@
+"""Тесты клиента OpenRouter (без сети, через MockTransport)."""
+import asyncio
+import json
+import httpx
+import pytest
+from src.services import openrouter_client, token_logger
+from src.services.openrouter_client import OpenRouterClient, OpenRouterError
+
+
+def _ok_response() -> httpx.Response:
+    return httpx.Response(
+        200,
+        json={
+            "choices": [{"message": {"content": '```json\n{"action": "unclear"}\n```'}}],
+            "usage": {"prompt_tokens": 100, "completion_tokens": 20, "cost": 0.0012},
+        },
+    )
+
+
+@pytest.fixture(autouse=True)
+def _isolate(tmp_path, monkeypatch):
+    """Лог токенов во временную папку, повторы без реального ожидания."""
+    monkeypatch.setattr(token_logger, "TOKEN_LOG_FILE", tmp_path / "token_usage.jsonl")
+    monkeypatch.setattr(openrouter_client, "RETRY_BASE_DELAY", 0.0)
+
+
+def _chat(client: OpenRouterClient):
+    return client.chat(
+        model="google/gemma-2-9b-it",
+        messages=[{"role": "user", "content": "250 грамм"}],
+        max_tokens=50,
+        temperature=0.1,
+        operation="edit_parse",
+    )
+
+
+def test_retries_on_429_and_honours_retry_after(tmp_path):
+    """429 с Retry-After повторяется, usage и время ответа записываются."""
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(json.loads(request.content))
+        if len(calls) == 1:
+            return httpx.Response(429, headers={"Retry-After": "0"})
+        return _ok_response()
+
+    async def run():
+        client = OpenRouterClient("test-key", transport=httpx.MockTransport(handler))
+        try:
+            return await _chat(client), client.get_stats()
+        finally:
+            await client.aclose()
+
+    result, stats = asyncio.run(run())
+
+    assert result["attempts"] == 2
+    assert result["cost_usd"] == 0.0012
+    assert result["tokens_input"] == 100
+    assert openrouter_client.extract_json_content(result["content"]) == {"action": "unclear"}
+    assert calls[0]["usage"] == {"include": True}
+    assert stats["google/gemma-2-9b-it"]["retries"] == 1
+
+    entry = json.loads((tmp_path / "token_usage.jsonl").read_text(encoding="utf-8"))
+    assert entry["operation"] == "edit_parse"
+    assert "ttfb_ms" in entry and "latency_ms" in entry
+
+
+def test_client_errors_are_not_retried():
+    """4xx (кроме 429) не повторяется."""
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(400, json={"error": "bad request"})
+
+    async def run():
+        client = OpenRouterClient("test-key", transport=httpx.MockTransport(handler))
+        try:
+            await _chat(client)
+        finally:
+            await client.aclose()
+
+    with pytest.raises(OpenRouterError):
+        asyncio.run(run())
+    assert len(calls) == 1
+
+
+def test_gives_up_after_max_attempts():
+    """Постоянные 503 — ошибка после MAX_ATTEMPTS попыток."""
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(503)
+
+    async def run():
+        client = OpenRouterClient("test-key", transport=httpx.MockTransport(handler))
+        try:
+            await _chat(client)
+        finally:
+            await client.aclose()
+
+    with pytest.raises(OpenRouterError):
+        asyncio.run(run())
+    assert len(calls) == openrouter_client.MAX_ATTEMPTS